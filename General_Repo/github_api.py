@@ -1,3 +1,4 @@
+import asyncio
 import aiohttp
 from github import Github
 from github.GithubException import GithubException
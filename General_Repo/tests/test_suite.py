@@ -1,46 +1,69 @@
 import unittest
 import asyncio
 from unittest.mock import Mock, patch
+from types import SimpleNamespace
 import os
 import json
+import smtplib
+import tempfile
 import time
+from datetime import datetime, timedelta
 from main import GitHubContributionTool
+from workspace_manager import WorkspaceManager, WorkspaceError
 
 class TestGitHubContributionTool(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.loop = asyncio.new_event_loop()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.loop.close()
+
     def setUp(self):
         self.tool = GitHubContributionTool()
-        self.loop = asyncio.get_event_loop()
 
     def test_load_config(self):
         config = self.tool.config.load_config()
         self.assertIsNotNone(config)
         self.assertIn('GITHUB_TOKEN', config)
 
-    @patch('main.GitHubAPI')
-    def test_fork_repository(self, mock_github_api):
-        mock_repo = Mock()
-        mock_github_api.return_value.get_repo.return_value = mock_repo
-        mock_forked_repo = Mock()
-        mock_github_api.return_value.fork_repo.return_value = mock_forked_repo
+    def test_fork_repository(self):
+        fake_repo = SimpleNamespace(full_name='owner/repo')
+        fake_forked_repo = object()
+        forked = []
+
+        def create_fork(repo):
+            forked.append(repo)
+            return fake_forked_repo
 
-        result = self.loop.run_until_complete(self.tool.github_api.fork_repo(mock_repo))
-        self.assertEqual(result, mock_forked_repo)
+        self.tool.github_api.github = SimpleNamespace(get_user=lambda: SimpleNamespace(create_fork=create_fork))
+
+        result = self.loop.run_until_complete(self.tool.github_api.fork_repo(fake_repo))
+        self.assertIs(result, fake_forked_repo)
+        self.assertEqual(forked, [fake_repo])
 
     @patch('main.GitOperations')
     def test_clone_repository(self, mock_git_ops):
-        mock_git_ops.return_value.clone_repo.return_value = Mock()
+        mock_git_ops.return_value.clone_repo.return_value = object()
         result = self.loop.run_until_complete(self.tool.git_ops.clone_repo('https://github.com/owner/repo.git', '/tmp/repo'))
         self.assertIsNotNone(result)
 
-    @patch('main.FileManager')
-    def test_update_file(self, mock_file_manager):
-        self.loop.run_until_complete(self.tool.file_manager.update_file('/tmp/file.txt', 'new content'))
-        mock_file_manager.return_value.update_file.assert_called_with('/tmp/file.txt', 'new content')
+    def test_update_file(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file_path = os.path.join(tmp_dir, 'file.txt')
+            with open(file_path, 'w') as f:
+                f.write('old content')
+
+            self.loop.run_until_complete(self.tool.file_manager.update_file(file_path, 'new content'))
+
+            with open(file_path) as f:
+                self.assertEqual(f.read(), 'new content')
 
     @patch('main.PRManager')
     def test_create_pull_request(self, mock_pr_manager):
-        mock_repo = Mock()
-        mock_pr = Mock()
+        mock_repo = object()
+        mock_pr = object()
         mock_pr_manager.return_value.create_pull_request.return_value = mock_pr
         result = self.loop.run_until_complete(self.tool.pr_manager.create_pull_request(mock_repo, 'branch', 'title', 'body'))
         self.assertEqual(result, mock_pr)
@@ -55,7 +78,7 @@ class TestGitHubContributionTool(unittest.TestCase):
 
     @patch('main.ChangelogGenerator')
     def test_generate_changelog(self, mock_changelog_gen):
-        mock_repo = Mock()
+        mock_repo = object()
         mock_changelog = "Changelog content"
         mock_changelog_gen.return_value.generate_changelog.return_value = mock_changelog
         
@@ -85,15 +108,24 @@ class TestGitHubContributionTool(unittest.TestCase):
 
     @patch('main.AsyncOperations')
     def test_run_with_retry(self, mock_async_ops):
-        mock_task = Mock(side_effect=[Exception(), Exception(), 'Success'])
+        outcomes = iter([Exception(), Exception(), 'Success'])
+
+        def mock_task():
+            outcome = next(outcomes)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+
         mock_async_ops.return_value.run_with_retry.return_value = 'Success'
-        result = self.loop.run_until_complete(self.tool.async_ops.run_with_retry(mock_task, max_retries=3, retry_delay=1))
+        result = self.loop.run_until_complete(self.tool.async_ops.run_with_retry(mock_task, max_retries=3, retry_delay=0))
         self.assertEqual(result, 'Success')
 
 
     @patch('main.UndoManager')
     def test_execute_action_and_undo(self, mock_undo_manager):
-        mock_action = Mock(return_value='Action result')
+        def mock_action():
+            return 'Action result'
+
         mock_undo_manager.return_value.execute_action.return_value = 'Action result'
         
         result = self.loop.run_until_complete(self.tool.undo_manager.execute_action(mock_action))
@@ -114,12 +146,27 @@ class TestGitHubContributionTool(unittest.TestCase):
         self.assertIn('WARNING:github_contribution_tool:Test warning message', cm.output[1])
         self.assertIn('ERROR:github_contribution_tool:Test error message', cm.output[2])
 
-    @patch('main.RateLimiter')
-    def test_rate_limit_handling(self, mock_rate_limiter):
-        mock_rate_limiter.return_value.check_rate_limit.return_value = None
-        
-        self.loop.run_until_complete(self.tool.rate_limiter.check_rate_limit())
-        mock_rate_limiter.return_value.check_rate_limit.assert_called_once()
+    def test_rate_limit_handling(self):
+        reset = datetime.now() - timedelta(seconds=1)
+        remaining = iter([10, 0])
+        warnings = []
+
+        async def get_rate_limit():
+            return SimpleNamespace(core=SimpleNamespace(remaining=next(remaining), limit=5000, reset=reset))
+
+        rate_limiter = self.tool.rate_limiter
+        rate_limiter.github_api = SimpleNamespace(get_rate_limit=get_rate_limit)
+        rate_limiter.logger = SimpleNamespace(info=lambda msg: None, warning=warnings.append, error=lambda msg: None)
+
+        self.loop.run_until_complete(rate_limiter.check_rate_limit())
+        self.assertEqual(rate_limiter.rate_limit.core.remaining, 10)
+        self.assertEqual(rate_limiter.rate_limit_reset, reset.timestamp())
+        self.assertEqual(warnings, [])
+
+        # Exhausted limit: waits until the (already past) reset time
+        self.loop.run_until_complete(rate_limiter.check_rate_limit())
+        self.assertEqual(len(warnings), 1)
+        self.assertIn('Rate limit exceeded', warnings[0])
 
     @patch('main.SecurityManager')
     def test_encrypt_and_decrypt_data(self, mock_security_manager):
@@ -175,13 +222,17 @@ class TestGitHubContributionTool(unittest.TestCase):
         slow_function()
         mock_performance_monitor.return_value.time_function.assert_called()
 
-    @patch('main.PerformanceMonitor')
-    def test_resource_monitoring(self, mock_performance_monitor):
+    @patch('performance_monitor.psutil.Process')
+    def test_resource_monitoring(self, mock_process):
+        mock_process.return_value = SimpleNamespace(memory_info=lambda: SimpleNamespace(rss=2 * 1024 * 1024))
+        messages = []
+        self.tool.performance_monitor.logger = SimpleNamespace(info=messages.append)
+
         self.tool.performance_monitor.log_memory_usage()
-        mock_performance_monitor.return_value.log_memory_usage.assert_called_once()
 
-    @patch('main.ErrorHandler')
-    def test_input_validation(self, mock_error_handler):
+        self.assertEqual(messages, ["Memory usage: 2.00 MB"])
+
+    def test_input_validation(self):
         def validate_positive(x):
             return x > 0
 
@@ -193,9 +244,8 @@ class TestGitHubContributionTool(unittest.TestCase):
         with self.assertRaises(ValueError):
             process_positive_number(-5)
 
-    @patch('main.smtplib.SMTP')
-    @patch('main.ErrorHandler')
-    def test_error_notification(self, mock_error_handler, mock_smtp):
+    @patch('smtplib.SMTP')
+    def test_error_notification(self, mock_smtp):
         def send_notification(error_message):
             with smtplib.SMTP('localhost') as server:
                 server.sendmail('from@example.com', 'to@example.com', error_message)
@@ -207,7 +257,9 @@ class TestGitHubContributionTool(unittest.TestCase):
         with self.assertRaises(ValueError):
             problematic_function()
 
-        mock_smtp.return_value.sendmail.assert_called_once()
+        mock_smtp.return_value.__enter__.return_value.sendmail.assert_called_once_with(
+            'from@example.com', 'to@example.com', 'Critical error occurred'
+        )
 
     @patch('main.ErrorHandler')
     def test_graceful_shutdown(self, mock_error_handler):
@@ -273,7 +325,7 @@ class TestGitHubContributionTool(unittest.TestCase):
     def test_performance_profiling(self, mock_performance_monitor):
         @self.tool.performance_monitor.profile_function
         def function_to_profile():
-            time.sleep(0.1)
+            time.sleep(0)
             return sum(range(1000000))
 
         result = function_to_profile()
@@ -281,16 +333,16 @@ class TestGitHubContributionTool(unittest.TestCase):
         self.assertGreater(result, 0)
         mock_performance_monitor.return_value.profile_function.assert_called()
 
-    @patch('main.ErrorHandler')
-    def test_error_notification_system(self, mock_error_handler):
-        error_message = "Critical error in module X"
-        self.tool.error_handler.send_error_notification(error_message)
-        
-        mock_error_handler.return_value.send_error_notification.assert_called_once_with(error_message)
-
     @patch('main.RateLimiter')
     def test_rate_limiter_with_exponential_backoff(self, mock_rate_limiter):
-        mock_function = Mock(side_effect=[Exception(), Exception(), "Success"])
+        outcomes = iter([Exception(), Exception(), "Success"])
+
+        def mock_function():
+            outcome = next(outcomes)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+
         mock_rate_limiter.return_value.execute_with_backoff.return_value = "Success"
         
         result = self.loop.run_until_complete(self.tool.rate_limiter.execute_with_backoff(mock_function, max_retries=3))
@@ -310,8 +362,8 @@ class TestGitHubContributionTool(unittest.TestCase):
 
     @patch('main.AsyncOperations')
     def test_async_bulk_operations(self, mock_async_ops):
-        mock_operations = [Mock() for _ in range(5)]
-        mock_async_ops.return_value.run_in_parallel.return_value = [Mock() for _ in range(5)]
+        mock_operations = [lambda: None for _ in range(5)]
+        mock_async_ops.return_value.run_in_parallel.return_value = [object() for _ in range(5)]
         
         results = self.loop.run_until_complete(self.tool.async_ops.run_in_parallel(mock_operations))
         
@@ -338,6 +390,270 @@ class TestGitHubContributionTool(unittest.TestCase):
         mock_undo_manager.return_value.undo.assert_called()
         mock_undo_manager.return_value.redo.assert_called()
 
+    def test_execute_actions_bulk(self):
+        undo_manager = self.tool.undo_manager
+
+        def create_file(path, content):
+            with open(path, 'w') as f:
+                f.write(content)
+            return path
+
+        async def create_file_async(path, content):
+            return create_file(path, content)
+
+        def failing_action(path):
+            raise ValueError("bulk failure")
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            paths = [os.path.join(tmp_dir, f"file{i}.txt") for i in range(4)]
+            results = self.loop.run_until_complete(undo_manager.execute_actions_bulk([
+                (create_file, (paths[0], 'a'), {}),
+                (create_file_async, (paths[1], 'b'), {}),
+                (create_file, (paths[2], 'c'), {}),
+            ]))
+
+            self.assertEqual(results, paths[:3])
+            for path, content in zip(paths, 'abc'):
+                with open(path) as f:
+                    self.assertEqual(f.read(), content)
+            self.assertEqual(
+                self.loop.run_until_complete(undo_manager.get_undo_history()),
+                ['create_file', 'create_file_async', 'create_file']
+            )
+
+            with self.assertRaises(ValueError):
+                self.loop.run_until_complete(undo_manager.execute_actions_bulk([
+                    (create_file, (paths[3], 'd'), {}),
+                    (failing_action, (paths[0],), {}),
+                ]))
+            # Successful actions are still recorded; the failed one is not
+            self.assertEqual(
+                self.loop.run_until_complete(undo_manager.get_undo_history()),
+                ['create_file', 'create_file_async', 'create_file', 'create_file']
+            )
+
+            self.loop.run_until_complete(undo_manager.undo())
+            self.assertFalse(os.path.exists(paths[3]))
+            self.loop.run_until_complete(undo_manager.clear_history())
+
+    def test_execute_action_when_snapshot_fails(self):
+        undo_manager = self.tool.undo_manager
+        removed = []
+
+        def delete_file(path):
+            removed.append(path)
+            return None
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            # A directory cannot be snapshotted; the action must still run
+            self.loop.run_until_complete(undo_manager.execute_action(delete_file, tmp_dir))
+            results = self.loop.run_until_complete(undo_manager.execute_actions_bulk([
+                (delete_file, (tmp_dir,), {}),
+                (delete_file, (None,), {}),
+            ]))
+
+        self.assertEqual(removed, [tmp_dir, tmp_dir, None])
+        self.assertEqual(results, [None, None])
+        self.assertEqual(
+            self.loop.run_until_complete(undo_manager.get_undo_history()),
+            ['delete_file', 'delete_file', 'delete_file']
+        )
+        self.loop.run_until_complete(undo_manager.clear_history())
+
+    def test_spilled_snapshots_removed_with_their_entries(self):
+        undo_manager = self.tool.undo_manager
+        undo_manager.snapshot_spill_threshold = 4
+        undo_manager.max_undo_steps = 1
+
+        def modify_file(path, content):
+            with open(path, 'w') as f:
+                f.write(content)
+
+        def failing_modify(path, content):
+            raise ValueError("modify failure")
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            paths = [os.path.join(tmp_dir, f"file{i}.txt") for i in range(2)]
+            for path in paths:
+                with open(path, 'w') as f:
+                    f.write('original content')
+
+            self.loop.run_until_complete(undo_manager.execute_action(modify_file, paths[0], 'first'))
+            first_spill = undo_manager.undo_stack[0]['snapshot']
+            self.assertTrue(os.path.exists(first_spill))
+
+            # Evicting the entry removes its spill file
+            self.loop.run_until_complete(undo_manager.execute_action(modify_file, paths[1], 'second'))
+            second_spill = undo_manager.undo_stack[0]['snapshot']
+            self.assertFalse(os.path.exists(first_spill))
+
+            # So does a failed action
+            with self.assertRaises(ValueError):
+                self.loop.run_until_complete(undo_manager.execute_action(failing_modify, paths[0], 'third'))
+            self.assertEqual(undo_manager._spill_files, [second_spill])
+
+            # And replacing the stacks with a loaded state
+            state_file = os.path.join(tmp_dir, 'state.json')
+            with open(state_file, 'w') as f:
+                json.dump({'undo_stack': [], 'redo_stack': []}, f)
+            self.loop.run_until_complete(undo_manager.load_state(state_file))
+            self.assertFalse(os.path.exists(second_spill))
+            self.assertEqual(undo_manager._spill_files, [])
+
+    def test_cached_descriptor_released_before_action(self):
+        undo_manager = self.tool.undo_manager
+        undo_manager.fd_cache_ttl = 60
+
+        def delete_file(path):
+            os.remove(path)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'file.txt')
+            with open(path, 'w') as f:
+                f.write('content')
+
+            self.loop.run_until_complete(undo_manager.execute_action(delete_file, path))
+            self.loop.run_until_complete(undo_manager.undo())
+            self.assertIn(path, undo_manager._fd_cache)
+
+            # The restore's descriptor must not be held open while the file is deleted again
+            self.loop.run_until_complete(undo_manager.execute_action(delete_file, path))
+            self.assertNotIn(path, undo_manager._fd_cache)
+            self.assertFalse(os.path.exists(path))
+            self.loop.run_until_complete(undo_manager.clear_history())
+
+    def test_undo_after_save_and_load_state(self):
+        undo_manager = self.tool.undo_manager
+        undo_manager.snapshot_spill_threshold = 16
+
+        def modify_file(path, content):
+            with open(path, 'w') as f:
+                f.write(content)
+
+        def read(path):
+            with open(path) as f:
+                return f.read()
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            small_path = os.path.join(tmp_dir, 'small.txt')
+            large_path = os.path.join(tmp_dir, 'large.txt')
+            state_path = os.path.join(tmp_dir, 'state.json')
+            modify_file(small_path, 'precious')
+            modify_file(large_path, 'x' * 64)
+
+            self.loop.run_until_complete(undo_manager.execute_action(modify_file, small_path, 'changed'))
+            self.loop.run_until_complete(undo_manager.execute_action(modify_file, large_path, 'changed'))
+            self.loop.run_until_complete(undo_manager.save_state(state_path))
+            # Drops the in-memory snapshots and the spill file of the large one
+            self.loop.run_until_complete(undo_manager.clear_history())
+
+            self.loop.run_until_complete(undo_manager.load_state(state_path))
+            self.loop.run_until_complete(undo_manager.undo())
+            self.loop.run_until_complete(undo_manager.undo())
+            self.assertEqual(read(large_path), 'x' * 64)
+            self.assertEqual(read(small_path), 'precious')
+
+            # A state saved without snapshots must not empty the file on undo
+            with open(state_path, 'w') as f:
+                json.dump({'undo_stack': [{'action_name': 'modify_file', 'args': [small_path], 'kwargs': {}, 'result': None}],
+                           'redo_stack': []}, f)
+            self.loop.run_until_complete(undo_manager.load_state(state_path))
+            self.loop.run_until_complete(undo_manager.undo())
+            self.assertEqual(read(small_path), 'precious')
+            self.loop.run_until_complete(undo_manager.clear_history())
+
+    def _workspace(self, tmp_dir, files):
+        manager = WorkspaceManager(os.path.join(tmp_dir, 'workspaces'), Mock(), {})
+        self.loop.run_until_complete(manager.initialize())
+        workspace = self.loop.run_until_complete(manager.create_workspace('example-repo'))
+        for name, content in files.items():
+            path = os.path.join(workspace, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as f:
+                f.write(content)
+        return manager, workspace
+
+    def test_workspace_find_files(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            manager, workspace = self._workspace(tmp_dir, {
+                'main.py': '', 'pkg/util.py': '', 'pkg/util.pyc': '', 'README.md': '', 'test_a.py': ''
+            })
+            find = lambda pattern: sorted(
+                os.path.relpath(path, workspace)
+                for path in self.loop.run_until_complete(manager.find_files('example-repo', pattern))
+            )
+
+            # Plain patterns keep matching as a suffix
+            self.assertEqual(find('.py'), ['main.py', os.path.join('pkg', 'util.py'), 'test_a.py'])
+            self.assertEqual(find('*.py'), ['main.py', os.path.join('pkg', 'util.py'), 'test_a.py'])
+            self.assertEqual(find('test_?.py'), ['test_a.py'])
+            self.assertEqual(find('*.py[c]'), [os.path.join('pkg', 'util.pyc')])
+            self.assertEqual(find('README*'), ['README.md'])
+            self.assertEqual(find('*.rst'), [])
+            with self.assertRaises(WorkspaceError):
+                self.loop.run_until_complete(manager.find_files('other/repo', '*.py'))
+
+    def test_workspace_get_file_hashes(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            manager, workspace = self._workspace(tmp_dir, {'a.txt': 'alpha', 'sub/b.txt': 'beta'})
+            paths = ['a.txt', os.path.join('sub', 'b.txt')]
+
+            hashes = self.loop.run_until_complete(manager.get_file_hashes('example-repo', paths))
+
+            self.assertEqual(list(hashes), paths)
+            for path in paths:
+                self.assertEqual(hashes[path], self.loop.run_until_complete(manager.get_file_hash('example-repo', path)))
+            self.assertNotEqual(hashes['a.txt'], hashes[paths[1]])
+
+            with self.assertRaises(WorkspaceError) as cm:
+                self.loop.run_until_complete(manager.get_file_hashes('example-repo', ['a.txt', 'missing.txt']))
+            self.assertIn('missing.txt', str(cm.exception))
+
+    def test_workspace_clean_and_delete_leave_symlink_targets(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            outside = os.path.join(tmp_dir, 'outside')
+            os.makedirs(outside)
+            outside_file = os.path.join(outside, 'keep.txt')
+            with open(outside_file, 'w') as f:
+                f.write('keep')
+
+            manager, workspace = self._workspace(tmp_dir, {'a.txt': 'a', 'sub/deep/b.txt': 'b'})
+            os.symlink(outside, os.path.join(workspace, 'linked_dir'))
+            os.symlink(outside_file, os.path.join(workspace, 'sub', 'linked_file'))
+
+            self.loop.run_until_complete(manager.clean_workspace('example-repo'))
+            self.assertEqual(os.listdir(workspace), [])
+            self.assertEqual(os.listdir(outside), ['keep.txt'])
+
+            os.symlink(outside, os.path.join(workspace, 'linked_dir'))
+            self.loop.run_until_complete(manager.delete_workspace('example-repo'))
+            self.assertFalse(os.path.lexists(workspace))
+            self.assertEqual(os.listdir(outside), ['keep.txt'])
+            self.assertFalse(self.loop.run_until_complete(manager.workspace_exists('example-repo')))
+
+    @patch('workspace_manager.datetime')
+    def test_workspace_backup_never_overwrites(self, mock_datetime):
+        mock_datetime.now.return_value = datetime(2024, 1, 2, 3, 4, 5)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            manager, workspace = self._workspace(tmp_dir, {'a.txt': 'a', 'sub/b.txt': 'b'})
+            os.symlink('a.txt', os.path.join(workspace, 'link'))
+
+            backup_path = self.loop.run_until_complete(manager.backup_workspace('example-repo'))
+            self.assertEqual(backup_path, os.path.join(manager.base_path, 'example-repo_backup_20240102_030405'))
+            with open(os.path.join(backup_path, 'sub', 'b.txt')) as f:
+                self.assertEqual(f.read(), 'b')
+            # The copy lands in backup_path itself and keeps symlinks as links
+            self.assertEqual(sorted(os.listdir(backup_path)), ['a.txt', 'link', 'sub'])
+            self.assertEqual(os.readlink(os.path.join(backup_path, 'link')), 'a.txt')
+
+            # A second backup in the same second collides and must leave the first untouched
+            with open(os.path.join(workspace, 'a.txt'), 'w') as f:
+                f.write('changed')
+            with self.assertRaises(WorkspaceError):
+                self.loop.run_until_complete(manager.backup_workspace('example-repo'))
+            with open(os.path.join(backup_path, 'a.txt')) as f:
+                self.assertEqual(f.read(), 'a')
+
     @patch('main.GitHubAPI')
     def test_github_api_pagination(self, mock_github_api):
         mock_github_api.return_value.get_all_issues.return_value = [{'id': 1}, {'id': 2}, {'id': 3}, {'id': 4}]
@@ -1,7 +1,83 @@
 import asyncio
-from typing import List, Dict, Any, Callable
-import json
+import base64
+from typing import List, Dict, Any, Callable, Iterator, Optional, Tuple
+import aiofiles
+import orjson
 import os
+from operator import itemgetter
+import shutil
+import tempfile
+import threading
+import time
+from weakref import WeakKeyDictionary, finalize
+
+def _undo_custom(manager, action, args, kwargs, result, snapshot):
+    return lambda: action.undo(*args, **kwargs)
+
+def _undo_create_file(manager, action, args, kwargs, result, snapshot):
+    return lambda: os.remove(args[0])
+
+def _undo_delete_file(manager, action, args, kwargs, result, snapshot):
+    if snapshot is not None:
+        return lambda: manager.restore_snapshot(args[0], snapshot)
+    return lambda: manager.restore_file(args[0], result)
+
+def _undo_modify_file(manager, action, args, kwargs, result, snapshot):
+    if snapshot is not None:
+        return lambda: manager.restore_snapshot(args[0], snapshot)
+    return lambda: manager.restore_file_content(args[0], kwargs.get('original_content', ''))
+
+def _undo_rename_file(manager, action, args, kwargs, result, snapshot):
+    return lambda: os.rename(args[1], args[0])
+
+# Undo factories keyed by action name, so entries can be rebuilt from a saved state
+_UNDO_DISPATCH: Dict[str, Callable[..., Callable[[], Any]]] = {
+    'create_file': _undo_create_file,
+    'delete_file': _undo_delete_file,
+    'modify_file': _undo_modify_file,
+    'rename_file': _undo_rename_file,
+}
+
+# Factories whose undo does real file I/O and should run in a worker thread
+_BLOCKING_FACTORIES = frozenset({_undo_custom, _undo_delete_file, _undo_modify_file})
+
+# Factories that need the target file captured before the action runs
+_SNAPSHOT_FACTORIES = frozenset({_undo_delete_file, _undo_modify_file})
+
+# Actions that only rewrite the file in place; before running, undoing or redoing any
+# other action, cached descriptors on its paths are closed (an open fd blocks
+# delete/rename on Windows)
+_IN_PLACE_ACTIONS = frozenset({'modify_file'})
+
+_action_name = itemgetter('action_name')
+
+def _has_content_fallback(factory, kwargs: Dict[str, Any], result: Any) -> bool:
+    """Return whether a snapshot-based undo can fall back to content recorded in the entry itself."""
+    if factory is _undo_modify_file:
+        return 'original_content' in kwargs
+    return isinstance(result, str)
+
+def _remove_spill_files(spill_files: List[str]):
+    """Delete spilled snapshot files left over when a manager is discarded or the process exits."""
+    for spill_path in spill_files:
+        try:
+            os.remove(spill_path)
+        except OSError:
+            pass
+    spill_files.clear()
+
+def _serializable(entry: Dict[str, Any], snapshot_ref: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """Return the JSON-serializable descriptor of an undo stack entry."""
+    descriptor = {
+        'action_name': entry['action_name'],
+        'args': entry['args'],
+        'kwargs': entry['kwargs'],
+        'result': entry.get('result'),
+        'blocking': entry.get('blocking', True)
+    }
+    if snapshot_ref is not None:
+        descriptor['snapshot'] = snapshot_ref
+    return descriptor
 
 class UndoManager:
     def __init__(self, logger):
@@ -9,6 +85,15 @@ class UndoManager:
         self.undo_stack = []
         self.redo_stack = []
         self.max_undo_steps = 50
+        self.snapshot_spill_threshold = 1024 * 1024
+        self._dispatch_cache = WeakKeyDictionary()
+        self._spill_files: List[str] = []
+        # Runs when the manager is garbage collected or, at the latest, at interpreter exit
+        finalize(self, _remove_spill_files, self._spill_files)
+        self.fd_cache_ttl = 0.1
+        self._fd_cache: Dict[str, Tuple[int, float]] = {}
+        self._fd_cache_lock = threading.Lock()
+        self._fd_sweep_handle: Optional[asyncio.TimerHandle] = None
 
     async def execute_action(self, action: Callable[..., Any], *args, **kwargs) -> Any:
         """
@@ -20,17 +105,71 @@ class UndoManager:
         :return: Result of the action
         """
         try:
-            result = await asyncio.to_thread(action, *args, **kwargs)
-            undo_action = await self.create_undo_action(action, args, kwargs, result)
+            snapshot = await self._snapshot_for(action, args)
+            self._release_files_for(action.__name__, args)
+            try:
+                result = await self._run_action(action, args, kwargs)
+            except Exception:
+                self._discard_snapshot(snapshot)
+                raise
+            undo_action = self.create_undo_action(action, args, kwargs, result, snapshot)
             self.undo_stack.append(undo_action)
             if len(self.undo_stack) > self.max_undo_steps:
-                self.undo_stack.pop(0)
+                self._discard_entries([self.undo_stack.pop(0)])
+            self._discard_entries(self.redo_stack)
             self.redo_stack.clear()
             return result
         except Exception as e:
             self.logger.error(f"Error executing action {action.__name__}: {str(e)}")
             raise
 
+    async def execute_actions_bulk(self, actions_with_args: List[Tuple[Callable[..., Any], tuple, dict]]) -> List[Any]:
+        """
+        Execute independent actions in parallel and add them to the undo stack in order.
+        
+        :param actions_with_args: List of (action, args, kwargs) tuples
+        :return: List of results, in the same order as the actions
+        """
+        snapshots = await asyncio.gather(
+            *[self._snapshot_for(action, args) for action, args, kwargs in actions_with_args]
+        )
+        for action, args, kwargs in actions_with_args:
+            self._release_files_for(action.__name__, args)
+        results = await asyncio.gather(
+            *[self._run_action(action, args, kwargs) for action, args, kwargs in actions_with_args],
+            return_exceptions=True
+        )
+        first_error = None
+        for (action, args, kwargs), result, snapshot in zip(actions_with_args, results, snapshots):
+            if isinstance(result, Exception):
+                self.logger.error(f"Error executing action {action.__name__}: {str(result)}")
+                first_error = first_error or result
+                self._discard_snapshot(snapshot)
+                continue
+            self.undo_stack.append(self.create_undo_action(action, args, kwargs, result, snapshot))
+        if len(self.undo_stack) > self.max_undo_steps:
+            evicted = len(self.undo_stack) - self.max_undo_steps
+            self._discard_entries(self.undo_stack[:evicted])
+            del self.undo_stack[:evicted]
+        self._discard_entries(self.redo_stack)
+        self.redo_stack.clear()
+        if first_error is not None:
+            raise first_error
+        return results
+
+    async def _run_action(self, action: Callable[..., Any], args: tuple, kwargs: dict) -> Any:
+        """
+        Run an action, awaiting coroutine functions and offloading blocking ones to a worker thread.
+        
+        :param action: The action to run
+        :param args: Positional arguments for the action
+        :param kwargs: Keyword arguments for the action
+        :return: Result of the action
+        """
+        if asyncio.iscoroutinefunction(action):
+            return await action(*args, **kwargs)
+        return await asyncio.to_thread(action, *args, **kwargs)
+
     async def undo(self) -> Any:
         """
         Undo the last action.
@@ -42,13 +181,24 @@ class UndoManager:
             return None
 
         undo_action = self.undo_stack.pop()
+        if undo_action['undo'] is None:
+            self.logger.warning(f"Action {undo_action['action_name']} was loaded without the data needed to undo it; skipping")
+            return None
+        self._release_files_for(undo_action['action_name'], undo_action['args'])
         try:
-            result = await asyncio.to_thread(undo_action['undo'])
+            if undo_action.get('blocking', True):
+                result = await asyncio.to_thread(undo_action['undo'])
+            else:
+                result = undo_action['undo']()
+            if asyncio.iscoroutine(result):
+                result = await result
             self.redo_stack.append(undo_action)
             return result
         except Exception as e:
             self.logger.error(f"Error undoing action: {str(e)}")
             raise
+        finally:
+            self._schedule_fd_sweep()
 
     async def redo(self) -> Any:
         """
@@ -60,16 +210,26 @@ class UndoManager:
             self.logger.warning("No actions to redo")
             return None
 
+        if self.redo_stack[-1]['redo'] is None:
+            self.logger.warning(f"Action {self.redo_stack[-1]['action_name']} was loaded from a saved state and cannot be redone")
+            return None
+
         redo_action = self.redo_stack.pop()
+        self._release_files_for(redo_action['action_name'], redo_action['args'])
         try:
-            result = await asyncio.to_thread(redo_action['redo'])
+            if redo_action.get('is_async'):
+                result = await redo_action['redo']()
+            else:
+                result = await asyncio.to_thread(redo_action['redo'])
             self.undo_stack.append(redo_action)
             return result
         except Exception as e:
             self.logger.error(f"Error redoing action: {str(e)}")
             raise
+        finally:
+            self._schedule_fd_sweep()
 
-    async def create_undo_action(self, action: Callable[..., Any], args: tuple, kwargs: dict, result: Any) -> Dict[str, Any]:
+    def create_undo_action(self, action: Callable[..., Any], args: tuple, kwargs: dict, result: Any, snapshot: Any = None) -> Dict[str, Any]:
         """
         Create an undo action for the given action.
         
@@ -77,19 +237,36 @@ class UndoManager:
         :param args: Arguments of the original action
         :param kwargs: Keyword arguments of the original action
         :param result: Result of the original action
+        :param snapshot: Contents of the target file taken before the action ran
         :return: Dictionary containing undo and redo functions
         """
-        undo_func = await self.get_undo_function(action, args, kwargs, result)
+        undo_func = self.get_undo_function(action, args, kwargs, result, snapshot)
         redo_func = lambda: action(*args, **kwargs)
         return {
             'undo': undo_func,
             'redo': redo_func,
+            'blocking': self.is_blocking_undo(action),
+            'is_async': asyncio.iscoroutinefunction(action),
             'action_name': action.__name__,
             'args': args,
-            'kwargs': kwargs
+            'kwargs': kwargs,
+            'result': result,
+            'snapshot': snapshot
         }
 
-    async def get_undo_function(self, action: Callable[..., Any], args: tuple, kwargs: dict, result: Any) -> Callable[[], Any]:
+    def is_blocking_undo(self, action: Callable[..., Any]) -> bool:
+        """
+        Check whether the undo function for the given action needs a worker thread.
+        
+        Undos that are no-ops or a single syscall (remove/rename) run inline,
+        which is cheaper than a round trip through the default executor.
+        
+        :param action: The original action
+        :return: True if the undo function should run in a worker thread
+        """
+        return self._get_factory(action) in _BLOCKING_FACTORIES
+
+    def get_undo_function(self, action: Callable[..., Any], args: tuple, kwargs: dict, result: Any, snapshot: Any = None) -> Callable[[], Any]:
         """
         Get the appropriate undo function for the given action.
         
@@ -97,21 +274,210 @@ class UndoManager:
         :param args: Arguments of the original action
         :param kwargs: Keyword arguments of the original action
         :param result: Result of the original action
+        :param snapshot: Contents of the target file taken before the action ran
         :return: Undo function
         """
-        if hasattr(action, 'undo'):
-            return lambda: action.undo(*args, **kwargs)
-        elif action.__name__ == 'create_file':
-            return lambda: os.remove(args[0])
-        elif action.__name__ == 'delete_file':
-            return lambda: self.restore_file(args[0], result)
-        elif action.__name__ == 'modify_file':
-            return lambda: self.restore_file_content(args[0], kwargs.get('original_content', ''))
-        elif action.__name__ == 'rename_file':
-            return lambda: os.rename(args[1], args[0])
-        else:
+        factory = self._get_factory(action)
+        if factory is None:
             self.logger.warning(f"No specific undo function for action {action.__name__}. Using default (do nothing).")
             return lambda: None
+        return factory(self, action, args, kwargs, result, snapshot)
+
+    def _get_factory(self, action: Callable[..., Any]) -> Optional[Callable[..., Callable[[], Any]]]:
+        """
+        Get the undo factory for the given action, resolving it only once per action.
+        
+        :param action: The original action
+        :return: Undo factory, or None if the action has no specific undo
+        """
+        try:
+            return self._dispatch_cache[action]
+        except (KeyError, TypeError):
+            factory = self._resolve_factory(action)
+            try:
+                self._dispatch_cache[action] = factory
+            except TypeError:
+                pass  # Not weak-referenceable (e.g. builtins); resolve again next time
+            return factory
+
+    def _resolve_factory(self, action: Callable[..., Any]) -> Optional[Callable[..., Callable[[], Any]]]:
+        """
+        Resolve the undo factory for the given action.
+        
+        :param action: The original action
+        :return: Undo factory, or None if the action has no specific undo
+        """
+        if hasattr(action, 'undo'):
+            return _undo_custom
+        return _UNDO_DISPATCH.get(action.__name__)
+
+    def rebuild_action(self, entry: Dict[str, Any], snapshot_dir: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Rebuild an undo stack entry from its serialized descriptor.
+        
+        Entries whose undo needs a snapshot that was not saved (and that have
+        no original content to fall back on) are rebuilt as not undoable,
+        rather than restoring the file to empty content.
+        
+        :param entry: Descriptor produced when saving the state
+        :param snapshot_dir: Directory holding spilled snapshots saved with the state
+        :return: Dictionary containing the undo function; redo is not available
+        """
+        args = tuple(entry['args'])
+        kwargs = entry['kwargs']
+        result = entry.get('result')
+        snapshot = self._load_snapshot_ref(entry.get('snapshot'), snapshot_dir)
+        factory = _UNDO_DISPATCH.get(entry['action_name'])
+        if factory is None:
+            self.logger.warning(f"No specific undo function for action {entry['action_name']}. Using default (do nothing).")
+            undo_func = lambda: None
+        elif factory in _SNAPSHOT_FACTORIES and snapshot is None and not _has_content_fallback(factory, kwargs, result):
+            self.logger.warning(f"No snapshot saved for action {entry['action_name']} on {args[0] if args else '?'}; it cannot be undone")
+            undo_func = None
+        else:
+            undo_func = factory(self, None, args, kwargs, result, snapshot)
+        return {
+            'undo': undo_func,
+            'redo': None,
+            'blocking': entry.get('blocking', True),
+            'action_name': entry['action_name'],
+            'args': args,
+            'kwargs': kwargs,
+            'result': result,
+            'snapshot': snapshot
+        }
+
+    def _snapshot_ref(self, snapshot: Any, snapshot_dir: str, index: int) -> Optional[Dict[str, str]]:
+        """
+        Persist a snapshot for a saved state.
+        
+        In-memory snapshots are embedded as base64; spilled snapshots are
+        copied next to the state file so they outlive clear_history.
+        
+        :param snapshot: File contents as bytes, path of the spilled copy, or None
+        :param snapshot_dir: Directory for spilled snapshots of this state
+        :param index: Position of the entry in the saved state
+        :return: JSON-serializable reference to the snapshot, or None
+        """
+        if isinstance(snapshot, bytes):
+            return {'data': base64.b64encode(snapshot).decode('ascii')}
+        if isinstance(snapshot, str):
+            name = f"{index}.snapshot"
+            os.makedirs(snapshot_dir, exist_ok=True)
+            shutil.copyfile(snapshot, os.path.join(snapshot_dir, name))
+            return {'path': name}
+        return None
+
+    def _load_snapshot_ref(self, snapshot_ref: Optional[Dict[str, str]], snapshot_dir: Optional[str]) -> Any:
+        """
+        Load a snapshot persisted by _snapshot_ref.
+        
+        Spilled snapshots are copied into a spill file owned by this manager,
+        so the entry does not depend on the state's snapshot directory.
+        
+        :param snapshot_ref: Reference stored in the saved state, or None
+        :param snapshot_dir: Directory holding spilled snapshots saved with the state
+        :return: File contents as bytes, path of the spilled copy, or None
+        """
+        if not snapshot_ref:
+            return None
+        if 'data' in snapshot_ref:
+            return base64.b64decode(snapshot_ref['data'])
+        if snapshot_dir is None:
+            return None
+        fd, spill_path = tempfile.mkstemp(prefix='undo_snapshot_')
+        os.close(fd)
+        try:
+            shutil.copyfile(os.path.join(snapshot_dir, snapshot_ref['path']), spill_path)
+        except OSError as e:
+            os.remove(spill_path)
+            self.logger.warning(f"Saved snapshot {snapshot_ref['path']} could not be loaded: {str(e)}")
+            return None
+        self._spill_files.append(spill_path)
+        return spill_path
+
+    def _discard_entries(self, entries: List[Dict[str, Any]]):
+        """
+        Delete the spilled snapshots of entries that are leaving the undo/redo stacks.
+        
+        :param entries: Entries being evicted, replaced or cleared
+        """
+        for entry in entries:
+            self._discard_snapshot(entry.get('snapshot'))
+
+    def _discard_snapshot(self, snapshot: Any):
+        """
+        Delete a snapshot's spill file, if it has one.
+        
+        :param snapshot: File contents as bytes, path of the spilled copy, or None
+        """
+        if not isinstance(snapshot, str) or snapshot not in self._spill_files:
+            return
+        self._spill_files.remove(snapshot)
+        try:
+            os.remove(snapshot)
+        except OSError as e:
+            self.logger.warning(f"Failed to remove undo snapshot {snapshot}: {str(e)}")
+
+    async def _snapshot_for(self, action: Callable[..., Any], args: tuple) -> Any:
+        """
+        Capture the target file of an action before it runs, if its undo needs it.
+        
+        :param action: The action about to be executed
+        :param args: Arguments of the action
+        :return: Snapshot of the target file, or None
+        """
+        if not args or self._get_factory(action) not in _SNAPSHOT_FACTORIES:
+            return None
+        try:
+            return await asyncio.to_thread(self.take_snapshot, args[0])
+        except (OSError, TypeError) as e:
+            # A failed snapshot must not stop the action; its undo falls back to recorded content
+            self.logger.warning(f"Could not snapshot {args[0]} before {action.__name__}: {str(e)}")
+            return None
+
+    def take_snapshot(self, file_path: str) -> Any:
+        """
+        Capture the current contents of a file.
+        
+        Files larger than snapshot_spill_threshold are copied to a temporary
+        file instead of being held in memory.
+        
+        :param file_path: Path of the file to capture
+        :return: File contents as bytes, path of the spilled copy, or None if the file does not exist
+        """
+        try:
+            if os.path.getsize(file_path) > self.snapshot_spill_threshold:
+                fd, spill_path = tempfile.mkstemp(prefix='undo_snapshot_')
+                os.close(fd)
+                try:
+                    shutil.copyfile(file_path, spill_path)
+                except OSError:
+                    os.remove(spill_path)
+                    raise
+                self._spill_files.append(spill_path)
+                return spill_path
+            with open(file_path, 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def restore_snapshot(self, file_path: str, snapshot: Any):
+        """
+        Restore a file from a snapshot taken by take_snapshot.
+        
+        :param file_path: Path of the file to restore
+        :param snapshot: File contents as bytes, or path of the spilled copy
+        """
+        try:
+            if isinstance(snapshot, bytes):
+                self._write_file(file_path, snapshot)
+            else:
+                shutil.copyfile(snapshot, file_path)
+            self.logger.info(f"Restored file from snapshot: {file_path}")
+        except Exception as e:
+            self.logger.error(f"Error restoring file {file_path} from snapshot: {str(e)}")
+            raise
 
     async def restore_file(self, file_path: str, content: str):
         """
@@ -121,8 +487,7 @@ class UndoManager:
         :param content: Content of the file
         """
         try:
-            with open(file_path, 'w') as f:
-                f.write(content)
+            self._write_file(file_path, content.encode())
             self.logger.info(f"Restored file: {file_path}")
         except Exception as e:
             self.logger.error(f"Error restoring file {file_path}: {str(e)}")
@@ -136,26 +501,112 @@ class UndoManager:
         :param content: Original content of the file
         """
         try:
-            with open(file_path, 'w') as f:
-                f.write(content)
+            self._write_file(file_path, content.encode())
             self.logger.info(f"Restored content of file: {file_path}")
         except Exception as e:
             self.logger.error(f"Error restoring content of file {file_path}: {str(e)}")
             raise
 
+    def _write_file(self, file_path: str, data: bytes):
+        """
+        Overwrite a file, reusing a recently opened descriptor for the same path.
+        
+        Repeated undo/redo of the same file within fd_cache_ttl skips the
+        open/close pair. A cached descriptor is only reused while it still
+        refers to the file at file_path (not deleted or renamed away).
+        
+        :param file_path: Path of the file to write
+        :param data: New contents of the file
+        """
+        with self._fd_cache_lock:
+            now = time.monotonic()
+            self._sweep_fd_cache(now)
+            cached = self._fd_cache.pop(file_path, None)
+            fd = None
+            if cached is not None:
+                try:
+                    if os.path.samestat(os.fstat(cached[0]), os.stat(file_path)):
+                        fd = cached[0]
+                except OSError:
+                    pass
+                if fd is None:
+                    os.close(cached[0])
+            if fd is None:
+                fd = os.open(file_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0), 0o644)
+            else:
+                os.ftruncate(fd, 0)
+                os.lseek(fd, 0, os.SEEK_SET)
+            try:
+                view = memoryview(data)
+                while view:
+                    view = view[os.write(fd, view):]
+            except OSError:
+                os.close(fd)
+                raise
+            self._fd_cache[file_path] = (fd, now)
+
+    def _sweep_fd_cache(self, now: float):
+        """Close cached descriptors that have not been used within fd_cache_ttl."""
+        for path, (fd, last_used) in list(self._fd_cache.items()):
+            if now - last_used > self.fd_cache_ttl:
+                del self._fd_cache[path]
+                os.close(fd)
+
+    def _schedule_fd_sweep(self):
+        """Close cached descriptors once they expire, even if no further write comes along."""
+        if self._fd_cache and self._fd_sweep_handle is None:
+            self._fd_sweep_handle = asyncio.get_running_loop().call_later(self.fd_cache_ttl, self._run_fd_sweep)
+
+    def _run_fd_sweep(self):
+        self._fd_sweep_handle = None
+        with self._fd_cache_lock:
+            self._sweep_fd_cache(time.monotonic())
+        self._schedule_fd_sweep()
+
+    def _release_files_for(self, action_name: str, args: tuple):
+        """Close cached descriptors on the paths of an action that may delete or rename them."""
+        if action_name in _IN_PLACE_ACTIONS or not self._fd_cache:
+            return
+        with self._fd_cache_lock:
+            for path in args:
+                cached = self._fd_cache.pop(path, None) if isinstance(path, str) else None
+                if cached is not None:
+                    os.close(cached[0])
+
+    def close_cached_files(self):
+        """Close all descriptors kept open for repeated restores."""
+        if self._fd_sweep_handle is not None:
+            self._fd_sweep_handle.cancel()
+            self._fd_sweep_handle = None
+        with self._fd_cache_lock:
+            for fd, _ in self._fd_cache.values():
+                os.close(fd)
+            self._fd_cache.clear()
+
     async def save_state(self, file_path: str):
         """
         Save the current undo/redo state to a file.
         
+        Entries are serialized and written one at a time, so peak memory is
+        bounded by the largest entry rather than the whole state. Spilled
+        snapshots are stored in a "<file_path>.snapshots" directory.
+        
         :param file_path: Path to save the state file
         """
-        state = {
-            'undo_stack': self.undo_stack,
-            'redo_stack': self.redo_stack
-        }
+        snapshot_dir = f"{file_path}.snapshots"
         try:
-            with open(file_path, 'w') as f:
-                json.dump(state, f)
+            if os.path.isdir(snapshot_dir):
+                await asyncio.to_thread(shutil.rmtree, snapshot_dir)
+            index = 0
+            async with aiofiles.open(file_path, 'wb') as f:
+                for opening, stack in ((b'{"undo_stack":[', self.undo_stack), (b'],"redo_stack":[', self.redo_stack)):
+                    await f.write(opening)
+                    for i, entry in enumerate(stack):
+                        snapshot_ref = await asyncio.to_thread(self._snapshot_ref, entry.get('snapshot'), snapshot_dir, index)
+                        index += 1
+                        data = orjson.dumps(_serializable(entry, snapshot_ref), default=str)
+                        await f.write(b',' + data if i else data)
+                await f.write(b']}')
             self.logger.info(f"Saved undo/redo state to {file_path}")
         except Exception as e:
             self.logger.error(f"Error saving undo/redo state: {str(e)}")
@@ -168,10 +619,15 @@ class UndoManager:
         :param file_path: Path of the state file to load
         """
         try:
-            with open(file_path, 'r') as f:
-                state = json.load(f)
-            self.undo_stack = state['undo_stack']
-            self.redo_stack = state['redo_stack']
+            async with aiofiles.open(file_path, 'rb') as f:
+                state = orjson.loads(await f.read())
+            snapshot_dir = f"{file_path}.snapshots"
+            rebuild = lambda entries: [self.rebuild_action(entry, snapshot_dir) for entry in entries]
+            undo_stack = await asyncio.to_thread(rebuild, state['undo_stack'])
+            redo_stack = await asyncio.to_thread(rebuild, state['redo_stack'])
+            self._discard_entries(self.undo_stack + self.redo_stack)
+            self.undo_stack = undo_stack
+            self.redo_stack = redo_stack
             self.logger.info(f"Loaded undo/redo state from {file_path}")
         except Exception as e:
             self.logger.error(f"Error loading undo/redo state: {str(e)}")
@@ -179,8 +635,12 @@ class UndoManager:
 
     async def clear_history(self):
         """Clear all undo and redo history."""
+        self._discard_entries(self.undo_stack + self.redo_stack)
         self.undo_stack.clear()
         self.redo_stack.clear()
+        # Spill files not owned by any entry (e.g. from an interrupted load_state)
+        _remove_spill_files(self._spill_files)
+        self.close_cached_files()
         self.logger.info("Cleared all undo/redo history")
 
     async def get_undo_history(self) -> List[str]:
@@ -189,7 +649,7 @@ class UndoManager:
         
         :return: List of action names
         """
-        return [action['action_name'] for action in self.undo_stack]
+        return list(map(_action_name, self.undo_stack))
 
     async def get_redo_history(self) -> List[str]:
         """
@@ -197,4 +657,20 @@ class UndoManager:
         
         :return: List of action names
         """
-        return [action['action_name'] for action in self.redo_stack]
+        return list(map(_action_name, self.redo_stack))
+
+    def iter_undo_history(self) -> Iterator[str]:
+        """
+        Iterate over action names in the undo stack without building a list.
+        
+        :return: Iterator of action names
+        """
+        return map(_action_name, self.undo_stack)
+
+    def iter_redo_history(self) -> Iterator[str]:
+        """
+        Iterate over action names in the redo stack without building a list.
+        
+        :return: Iterator of action names
+        """
+        return map(_action_name, self.redo_stack)
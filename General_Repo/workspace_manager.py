@@ -1,11 +1,201 @@
 import os
+import sys
+import errno
+import fnmatch
+import re
 import shutil
+import subprocess
 import tempfile
 import asyncio
-import aiofiles
+import functools
 import hashlib
+import string
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import Any, Callable, List, Dict, Iterator, Optional
+
+try:
+    import blake3
+except ImportError:
+    blake3 = None
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+_GLOB_CHARS = frozenset('*?[')
+
+_NAME_KEEP = frozenset(string.ascii_letters + string.digits + "-_")
+_NAME_TRANS = str.maketrans("", "", "".join(chr(c) for c in range(128) if chr(c) not in _NAME_KEEP))
+
+@functools.lru_cache(maxsize=1024)
+def _sanitize_name(name: str) -> str:
+    """Sanitize a name for use as a directory name."""
+    if name.isascii():
+        return name.translate(_NAME_TRANS)
+    return "".join(c for c in name if c.isalnum() or c in ['-', '_']).rstrip()
+
+# BLAKE3 is used for change detection when installed; it is several times faster than SHA-256
+_DEFAULT_HASHER: Callable[[], Any] = blake3.blake3 if blake3 is not None else hashlib.sha256
+
+def _reserve_fds(limit: int = 65536) -> None:
+    """Raise the open-file soft limit and grow the fd table to it up front (Linux only, best effort)."""
+    if not sys.platform.startswith('linux'):
+        return
+    import resource
+    try:
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        target = limit if hard == resource.RLIM_INFINITY else min(hard, limit)
+        if soft != resource.RLIM_INFINITY and soft < target:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+            soft = target
+        # Duplicating onto the highest fd makes the kernel size the table once,
+        # rather than resizing it while traversal threads race for descriptors
+        high_fd = min(soft, limit) - 1
+        try:
+            os.fstat(high_fd)
+            return  # already in use, so the table is already that large
+        except OSError:
+            pass
+        fd = os.open(os.devnull, os.O_RDONLY)
+        try:
+            os.dup2(fd, high_fd)
+            os.close(high_fd)
+        finally:
+            os.close(fd)
+    except (OSError, ValueError):
+        pass
+
+def _hash_file_sync(path: str, hasher: Callable[[], Any] = hashlib.sha256) -> str:
+    """Compute the hash of a file, reading it in fixed-size chunks."""
+    file_hash = hasher()
+    with open(path, 'rb', buffering=HASH_CHUNK_SIZE) as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b''):
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
+
+def _hash_many_sync(paths: Dict[str, str], hasher: Callable[[], Any] = hashlib.sha256) -> Dict[str, str]:
+    """Hash several files one after another, keyed like the input mapping."""
+    return {key: _hash_file_sync(path, hasher) for key, path in paths.items()}
+
+def _scantree(path: str, dirs: Optional[List[str]] = None) -> Iterator[os.DirEntry]:
+    """
+    Yield every non-directory entry below path using os.scandir.
+
+    Symlinks are not followed. If dirs is given, the path of each directory
+    found is appended to it; parents always come before their children.
+    """
+    stack = [path]
+    while stack:
+        with os.scandir(stack.pop()) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                    if dirs is not None:
+                        dirs.append(entry.path)
+                else:
+                    yield entry
+
+def _clean_tree(path: str):
+    """Remove everything below path, leaving path itself in place."""
+    if os.scandir in os.supports_fd and {os.unlink, os.rmdir} <= os.supports_dir_fd:
+        dir_fd = os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            _clean_dir_fd(dir_fd)
+        finally:
+            os.close(dir_fd)
+        return
+    dirs: List[str] = []
+    for entry in _scantree(path, dirs):
+        os.remove(entry.path)
+    for dir_path in reversed(dirs):
+        os.rmdir(dir_path)
+
+def _clean_dir_fd(dir_fd: int):
+    """
+    Remove everything inside an open directory in a single post-order pass.
+
+    Each directory is read once with os.scandir, entry types come from the
+    directory listing (no lstat per entry), and unlink/rmdir are issued
+    relative to the parent fd so full paths are never re-resolved.
+    """
+    with os.scandir(dir_fd) as it:
+        entries = list(it)
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False):
+            sub_fd = os.open(entry.name, os.O_RDONLY | os.O_DIRECTORY | os.O_NOFOLLOW, dir_fd=dir_fd)
+            try:
+                _clean_dir_fd(sub_fd)
+            finally:
+                os.close(sub_fd)
+            os.rmdir(entry.name, dir_fd=dir_fd)
+        else:
+            os.unlink(entry.name, dir_fd=dir_fd)
+
+def _remove_tree(path: str):
+    """Remove a directory and everything below it."""
+    _clean_tree(path)
+    os.rmdir(path)
+
+def _remove_files(paths: List[str]):
+    """Remove each of the given files."""
+    for path in paths:
+        os.remove(path)
+
+def _fast_copy(src: str, dst: str) -> str:
+    """Copy a file with copy_file_range so data stays in the kernel (or is reflinked)."""
+    if not hasattr(os, 'copy_file_range'):
+        return shutil.copy2(src, dst)
+    try:
+        with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+            remaining = os.fstat(fsrc.fileno()).st_size
+            while remaining > 0:
+                copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                if copied == 0:
+                    break
+                remaining -= copied
+    except OSError as e:
+        if e.errno not in (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP):
+            raise
+        return shutil.copy2(src, dst)
+    shutil.copystat(src, dst)
+    return dst
+
+def _copy_tree(src: str, dst: str):
+    """Copy a directory tree to a new path, using copy-on-write clones when the filesystem supports them."""
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    try:
+        # Claiming dst first makes the copy land in dst itself, never in dst/<basename>
+        os.mkdir(dst)
+    except FileExistsError:
+        raise WorkspaceError(f"Destination already exists: {dst}")
+    try:
+        if sys.platform.startswith('linux'):
+            command = ['cp', '--reflink=auto', '-a', os.path.join(src, '.'), dst]
+        elif sys.platform == 'darwin':
+            command = ['cp', '-Rpc', os.path.join(src, '.'), dst]
+        else:
+            command = None
+        if command and shutil.which('cp'):
+            try:
+                subprocess.run(command, check=True, capture_output=True)
+                return
+            except (OSError, subprocess.CalledProcessError):
+                shutil.rmtree(dst)
+                os.mkdir(dst)
+        shutil.copytree(src, dst, symlinks=True, copy_function=_fast_copy, dirs_exist_ok=True)
+    except BaseException:
+        # dst was created by this call, so a failed copy removes only its own output
+        shutil.rmtree(dst, ignore_errors=True)
+        raise
+
+def _subtree_size(path: str) -> int:
+    """Sum the sizes of all non-directory entries below path."""
+    if not hasattr(os, 'fwalk'):
+        return sum(entry.stat(follow_symlinks=False).st_size for entry in _scantree(path))
+    # fstatat relative to the open directory fd avoids resolving the full path per file
+    total_size = 0
+    for dirpath, dirnames, filenames, dirfd in os.fwalk(path):
+        for name in filenames:
+            total_size += os.stat(name, dir_fd=dirfd, follow_symlinks=False).st_size
+    return total_size
 
 class WorkspaceError(Exception):
     """Custom exception for workspace-related errors."""
@@ -18,6 +208,7 @@ class WorkspaceManager:
         self.config = config
         self.active_workspaces: Dict[str, str] = {}
         self.temp_dirs: List[str] = []
+        self.hasher = _DEFAULT_HASHER
 
     async def initialize(self):
         """Initialize the workspace manager."""
@@ -27,10 +218,11 @@ class WorkspaceManager:
                 self.logger.info(f"Created base workspace directory: {self.base_path}")
             except OSError as e:
                 raise WorkspaceError(f"Failed to create base workspace directory: {e}")
+        _reserve_fds()
 
     async def create_workspace(self, repo_name: str) -> str:
         """Create a new workspace for a repository."""
-        workspace_path = os.path.join(self.base_path, self._sanitize_name(repo_name))
+        workspace_path = os.path.join(self.base_path, _sanitize_name(repo_name))
         try:
             os.makedirs(workspace_path, exist_ok=True)
             self.active_workspaces[repo_name] = workspace_path
@@ -52,11 +244,7 @@ class WorkspaceManager:
         
         workspace_path = self.active_workspaces[repo_name]
         try:
-            for root, dirs, files in os.walk(workspace_path, topdown=False):
-                for name in files:
-                    os.remove(os.path.join(root, name))
-                for name in dirs:
-                    os.rmdir(os.path.join(root, name))
+            await self._remove_children(workspace_path)
             self.logger.info(f"Cleaned workspace for {repo_name}")
         except OSError as e:
             raise WorkspaceError(f"Failed to clean workspace for {repo_name}: {e}")
@@ -68,12 +256,33 @@ class WorkspaceManager:
         
         workspace_path = self.active_workspaces[repo_name]
         try:
-            shutil.rmtree(workspace_path)
+            await self._remove_children(workspace_path)
+            os.rmdir(workspace_path)
             del self.active_workspaces[repo_name]
             self.logger.info(f"Deleted workspace for {repo_name}")
         except OSError as e:
             raise WorkspaceError(f"Failed to delete workspace for {repo_name}: {e}")
 
+    async def _remove_children(self, path: str):
+        """Remove everything inside a directory, deleting top-level subtrees concurrently."""
+        subdirs = []
+        files = []
+        with os.scandir(path) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                else:
+                    files.append(entry.path)
+
+        semaphore = asyncio.Semaphore(os.cpu_count() or 1)
+        async def remove_subtree(dir_path):
+            async with semaphore:
+                await asyncio.to_thread(_remove_tree, dir_path)
+        await asyncio.gather(
+            asyncio.to_thread(_remove_files, files),
+            *[remove_subtree(dir_path) for dir_path in subdirs]
+        )
+
     async def create_temp_directory(self) -> str:
         """Create a temporary directory within the workspace."""
         try:
@@ -109,11 +318,19 @@ class WorkspaceManager:
         
         workspace_path = self.active_workspaces[repo_name]
         total_size = 0
-        for dirpath, dirnames, filenames in os.walk(workspace_path):
-            for f in filenames:
-                fp = os.path.join(dirpath, f)
-                total_size += os.path.getsize(fp)
-        return total_size
+        subdirs = []
+        with os.scandir(workspace_path) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                else:
+                    total_size += entry.stat(follow_symlinks=False).st_size
+
+        semaphore = asyncio.Semaphore((os.cpu_count() or 1) * 2)
+        async def subtree_size(path):
+            async with semaphore:
+                return await asyncio.to_thread(_subtree_size, path)
+        return total_size + sum(await asyncio.gather(*[subtree_size(path) for path in subdirs]))
 
     async def backup_workspace(self, repo_name: str) -> str:
         """Create a backup of a workspace."""
@@ -125,7 +342,7 @@ class WorkspaceManager:
         backup_path = os.path.join(self.base_path, backup_name)
         
         try:
-            shutil.copytree(workspace_path, backup_path)
+            await asyncio.to_thread(_copy_tree, workspace_path, backup_path)
             self.logger.info(f"Created backup of {repo_name} workspace at {backup_path}")
             return backup_path
         except OSError as e:
@@ -136,18 +353,18 @@ class WorkspaceManager:
         if not os.path.exists(backup_path):
             raise WorkspaceError(f"Backup path does not exist: {backup_path}")
         
-        workspace_path = os.path.join(self.base_path, self._sanitize_name(repo_name))
+        workspace_path = os.path.join(self.base_path, _sanitize_name(repo_name))
         try:
             if os.path.exists(workspace_path):
                 shutil.rmtree(workspace_path)
-            shutil.copytree(backup_path, workspace_path)
+            await asyncio.to_thread(_copy_tree, backup_path, workspace_path)
             self.active_workspaces[repo_name] = workspace_path
             self.logger.info(f"Restored {repo_name} workspace from backup at {backup_path}")
         except OSError as e:
             raise WorkspaceError(f"Failed to restore {repo_name} workspace from backup: {e}")
 
     async def get_file_hash(self, repo_name: str, file_path: str) -> str:
-        """Get the SHA-256 hash of a file in the workspace."""
+        """Get the content hash of a file in the workspace (BLAKE3 if installed, else SHA-256)."""
         if repo_name not in self.active_workspaces:
             raise WorkspaceError(f"No active workspace found for {repo_name}")
         
@@ -156,28 +373,40 @@ class WorkspaceManager:
             raise WorkspaceError(f"File not found: {full_path}")
         
         try:
-            async with aiofiles.open(full_path, 'rb') as file:
-                contents = await file.read()
-                return hashlib.sha256(contents).hexdigest()
+            return await asyncio.to_thread(_hash_file_sync, full_path, self.hasher)
         except IOError as e:
             raise WorkspaceError(f"Failed to read file {full_path}: {e}")
 
+    async def get_file_hashes(self, repo_name: str, file_paths: List[str]) -> Dict[str, str]:
+        """Get the content hashes of several files in the workspace in a single worker thread."""
+        if repo_name not in self.active_workspaces:
+            raise WorkspaceError(f"No active workspace found for {repo_name}")
+        
+        workspace_path = self.active_workspaces[repo_name]
+        full_paths = {file_path: os.path.join(workspace_path, file_path) for file_path in file_paths}
+        try:
+            return await asyncio.to_thread(_hash_many_sync, full_paths, self.hasher)
+        except FileNotFoundError as e:
+            raise WorkspaceError(f"File not found: {e.filename}")
+        except IOError as e:
+            raise WorkspaceError(f"Failed to read file {e.filename}: {e}")
+
     async def find_files(self, repo_name: str, pattern: str) -> List[str]:
-        """Find files in the workspace matching a given pattern."""
+        """
+        Find files in the workspace matching a pattern.
+
+        A pattern containing glob characters ('*', '?', '[') is matched as a
+        shell-style glob against the file name; any other pattern is matched
+        as a suffix, so '.py' finds every Python file.
+        """
         if repo_name not in self.active_workspaces:
             raise WorkspaceError(f"No active workspace found for {repo_name}")
         
         workspace_path = self.active_workspaces[repo_name]
-        matching_files = []
-        for root, dirs, files in os.walk(workspace_path):
-            for filename in files:
-                if filename.endswith(pattern):
-                    matching_files.append(os.path.join(root, filename))
-        return matching_files
-
-    def _sanitize_name(self, name: str) -> str:
-        """Sanitize a name for use as a directory name."""
-        return "".join(c for c in name if c.isalnum() or c in ['-', '_']).rstrip()
+        if _GLOB_CHARS.isdisjoint(pattern):
+            return [entry.path for entry in _scantree(workspace_path) if entry.name.endswith(pattern)]
+        match = re.compile(fnmatch.translate(pattern)).match
+        return [entry.path for entry in _scantree(workspace_path) if match(entry.name)]
 
     async def __aenter__(self):
         """Async context manager entry."""
@@ -4,12 +4,14 @@ import ssl
 import logging
 from datetime import datetime
 import configparser
+import contextlib
 import argparse
 import git
-import shutil
+import struct
 import time
 import smtplib
 from email.mime.text import MIMEText
+from concurrent.futures import ThreadPoolExecutor
 from filelock import FileLock
 
 
@@ -88,12 +90,14 @@ def ensure_repo_path(repo_path):
     except git.InvalidGitRepositoryError:
         raise EnvironmentError(f"'{repo_path}' is not a valid Git repository.")
 
-def create_backup(file_path):
-    """Create a backup of the file."""
-    backup_path = f"{file_path}.bak"
-    shutil.copy2(file_path, backup_path)
-    logging.info(f"Created backup of '{file_path}' at '{backup_path}'")
-    return backup_path
+def write_file_atomic(file_path, content):
+    """Write content to a file atomically and durably via a temporary file and os.replace."""
+    tmp_path = f"{file_path}.tmp"
+    with open(tmp_path, "w") as file:
+        file.write(content)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, file_path)
 
 def update_file(file_path, dry_run=False):
     """Update the file content based on its type and existing content."""
@@ -109,8 +113,6 @@ def update_file(file_path, dry_run=False):
                 logging.info(f"[DRY RUN] Would initialize '{file_path}' with value 0.")
             return "0"
 
-        backup_path = create_backup(file_path)
-
         try:
             with open(file_path, "r") as file:
                 content = file.read().strip()
@@ -135,8 +137,7 @@ def update_file(file_path, dry_run=False):
                 update_description = "new line added"
 
             if not dry_run:
-                with open(file_path, "w") as file:
-                    file.write(new_content)
+                write_file_atomic(file_path, new_content)
                 logging.info(f"Updated '{file_path}': {update_description}")
             else:
                 logging.info(f"[DRY RUN] Would update '{file_path}': {update_description}")
@@ -144,15 +145,34 @@ def update_file(file_path, dry_run=False):
             return update_description
 
         except Exception as e:
-            logging.error(f"Error updating {file_path}: {str(e)}. Restoring from backup.")
-            shutil.copy2(backup_path, file_path)
+            # The write is atomic, so on failure the original file is untouched
+            logging.error(f"Error updating {file_path}: {str(e)}. Original content left unchanged.")
             return None
 
+# Errors GitPython's IndexFile raises when .git/index cannot be parsed; the git CLI
+# reports the same condition as a GitCommandError
+INDEX_PARSE_ERRORS = (AssertionError, struct.error, ValueError)
+
+def reset_corrupt_index(repo):
+    """Rebuild a corrupt index from HEAD. The working tree is left untouched."""
+    logging.warning("Corrupted index file detected. Attempting to fix...")
+    # git reset cannot read a corrupt index either, so remove it first
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(os.path.join(repo.git_dir, "index"))
+    repo.git.reset()
+
 def commit_and_push(repo, file_paths, branch_name, remote_name, commit_message_prefix, new_values, dry_run=False):
     for attempt in range(MAX_RETRIES):
         try:
             if not dry_run:
-                repo.git.add(file_paths)
+                try:
+                    repo.index.add(file_paths)
+                except INDEX_PARSE_ERRORS as e:
+                    logging.warning(f"Could not read the index: {e!r}")
+                    reset_corrupt_index(repo)
+                    if attempt < MAX_RETRIES - 1:
+                        continue
+                    raise
                 commit_message = f"{commit_message_prefix}Updated counters: " + ", ".join(f"{path}: {value}" for path, value in zip(file_paths, new_values))
                 repo.index.commit(commit_message)
                 origin = repo.remote(name=remote_name)
@@ -163,8 +183,7 @@ def commit_and_push(repo, file_paths, branch_name, remote_name, commit_message_p
             return
         except git.GitCommandError as e:
             if "fatal: index file corrupt" in str(e):
-                logging.warning("Corrupted index file detected. Attempting to fix...")
-                repo.git.reset()
+                reset_corrupt_index(repo)
                 continue
             if attempt < MAX_RETRIES - 1:
                 logging.warning(f"Git operation failed (attempt {attempt + 1}/{MAX_RETRIES}): {str(e)}. Retrying in {RETRY_DELAY} seconds...")
@@ -216,7 +235,9 @@ def main():
         with repo:  
             setup_git_config(repo, config["GIT_USER_NAME"], config["GIT_USER_EMAIL"])
             
-            new_values = [update_file(file_path, dry_run=args.dry_run) for file_path in config["FILE_PATHS"]]
+            # Each update_file takes its own per-path FileLock, so files can be updated concurrently
+            with ThreadPoolExecutor(max_workers=min(32, len(config["FILE_PATHS"]))) as executor:
+                new_values = list(executor.map(lambda file_path: update_file(file_path, dry_run=args.dry_run), config["FILE_PATHS"]))
             commit_and_push(
                 repo,
                 config["FILE_PATHS"],
@@ -4,12 +4,17 @@ import ssl
 import logging
 from datetime import datetime
 import configparser
+import contextlib
 import argparse
+import asyncio
+import functools
+import threading
 import git
-import shutil
+import struct
 import time
 import smtplib
 from email.mime.text import MIMEText
+from concurrent.futures import ThreadPoolExecutor
 from filelock import FileLock
 import schedule
 
@@ -19,6 +24,9 @@ LOG_FILE = "auto_commit.log"
 MAX_RETRIES = 3
 RETRY_DELAY = 5  # seconds
 
+# Built once; loading the CA bundle is expensive
+SSL_CONTEXT = ssl.create_default_context()
+
 # Setup Logging
 logging.basicConfig(
     filename=LOG_FILE,
@@ -35,9 +43,14 @@ def load_config():
     """Load and validate configuration from config file."""
     if not os.path.exists(CONFIG_FILE):
         raise FileNotFoundError(f"Configuration file '{CONFIG_FILE}' not found.")
-    
+    # Keyed on mtime so edits to the file are still picked up
+    return _parse_config(CONFIG_FILE, os.stat(CONFIG_FILE).st_mtime_ns)
+
+@functools.lru_cache(maxsize=1)
+def _parse_config(config_file, mtime_ns):
+    """Parse and validate a config file; cached per (path, mtime)."""
     config = configparser.ConfigParser()
-    config.read(CONFIG_FILE)
+    config.read(config_file)
     
     required_sections = ["General", "Git", "Notification"]
     required_keys = {
@@ -59,6 +72,7 @@ def load_config():
         "BRANCH_NAME": config.get("General", "BRANCH_NAME"),
         "REMOTE_NAME": config.get("General", "REMOTE_NAME"),
         "COMMIT_MESSAGE_PREFIX": config.get("General", "COMMIT_MESSAGE_PREFIX"),
+        "SCHEDULE_INTERVAL_MINUTES": config.getint("General", "SCHEDULE_INTERVAL_MINUTES", fallback=24 * 60),
         "GIT_USER_NAME": config.get("Git", "GIT_USER_NAME"),
         "GIT_USER_EMAIL": config.get("Git", "GIT_USER_EMAIL"),
         "SMTP_SERVER": config.get("Notification", "SMTP_SERVER"),
@@ -87,72 +101,125 @@ def ensure_repo_path(repo_path):
     except git.InvalidGitRepositoryError:
         raise EnvironmentError(f"'{repo_path}' is not a valid Git repository.")
 
-def create_backup(file_path):
-    """Create a backup of the file."""
-    backup_path = f"{file_path}.bak"
-    shutil.copy2(file_path, backup_path)
-    logging.info(f"Created backup of '{file_path}' at '{backup_path}'")
-    return backup_path
+def write_file_atomic(file_path, content):
+    """Write content to a file atomically via a temporary file and os.replace."""
+    tmp_path = f"{file_path}.tmp"
+    with open(tmp_path, "w") as file:
+        file.write(content)
+    os.replace(tmp_path, file_path)
 
-def update_file(file_path, dry_run=False):
-    """Update the file content based on its type and existing content."""
-    lock = FileLock(f"{file_path}.lock")
+def compute_update(file_path, content, timestamp):
+    """Compute the new content and a description of the update for a file (no I/O)."""
+    file_name = os.path.basename(file_path).lower()
     
-    with lock:
-        if not os.path.exists(file_path):
-            if not dry_run:
-                with open(file_path, "w") as file:
-                    file.write("0")
-                logging.info(f"Initialized '{file_path}' with value 0.")
-            else:
-                logging.info(f"[DRY RUN] Would initialize '{file_path}' with value 0.")
-            return "0"
+    if "requirements.txt" in file_name:
+        # For requirements.txt, add a timestamp
+        return content + f"\n# Updated on {timestamp}", "timestamp added"
+    elif content.isdigit():
+        # If content is a number, increment it
+        new_content = str(int(content) + 1)
+        return new_content, f"incremented to {new_content}"
+    elif content.replace('.', '', 1).isdigit():
+        # If content is a float, increment it
+        new_content = str(float(content) + 1)
+        return new_content, f"incremented to {new_content}"
+    else:
+        # For other content, append a line
+        return content + f"\n# Updated on {timestamp}", "new line added"
 
-        backup_path = create_backup(file_path)
-
-        try:
-            with open(file_path, "r") as file:
-                content = file.read().strip()
-
-            file_name = os.path.basename(file_path).lower()
-            
-            if "requirements.txt" in file_name:
-                # For requirements.txt, add a timestamp
-                new_content = content + f"\n# Updated on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-                update_description = "timestamp added"
-            elif content.isdigit():
-                # If content is a number, increment it
-                new_content = str(int(content) + 1)
-                update_description = f"incremented to {new_content}"
-            elif content.replace('.', '', 1).isdigit():
-                # If content is a float, increment it
-                new_content = str(float(content) + 1)
-                update_description = f"incremented to {new_content}"
+def update_files(file_paths, dry_run=False):
+    """Update all files in three phases: read every file, compute the updates, then write them back."""
+    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    
+    with contextlib.ExitStack() as stack:
+        # Locks are taken in a fixed order so concurrent runs cannot deadlock
+        for file_path in sorted(set(file_paths)):
+            stack.enter_context(FileLock(f"{file_path}.lock"))
+        
+        # Phase 1: read
+        contents = {}
+        for file_path in file_paths:
+            try:
+                with open(file_path, "r") as file:
+                    contents[file_path] = file.read().strip()
+            except FileNotFoundError:
+                contents[file_path] = None
+            except Exception as e:
+                logging.error(f"Error reading {file_path}: {str(e)}. Original content left unchanged.")
+                contents[file_path] = e
+        
+        # Phase 2: compute
+        new_values = []
+        writes = []
+        for file_path in file_paths:
+            content = contents[file_path]
+            if content is None:
+                new_values.append("0")
+                writes.append((file_path, "0", None))
+            elif isinstance(content, Exception):
+                new_values.append(None)
             else:
-                # For other content, append a line
-                new_content = content + f"\n# Updated on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-                update_description = "new line added"
-
-            if not dry_run:
-                with open(file_path, "w") as file:
-                    file.write(new_content)
-                logging.info(f"Updated '{file_path}': {update_description}")
+                try:
+                    new_content, update_description = compute_update(file_path, content, timestamp)
+                except Exception as e:
+                    logging.error(f"Error updating {file_path}: {str(e)}. Original content left unchanged.")
+                    new_values.append(None)
+                    continue
+                new_values.append(update_description)
+                writes.append((file_path, new_content, update_description))
+        
+        # Phase 3: write
+        if dry_run:
+            for file_path, _, update_description in writes:
+                if update_description is None:
+                    logging.info(f"[DRY RUN] Would initialize '{file_path}' with value 0.")
+                else:
+                    logging.info(f"[DRY RUN] Would update '{file_path}': {update_description}")
+            return new_values
+        
+        def write(item):
+            file_path, new_content, update_description = item
+            try:
+                write_file_atomic(file_path, new_content)
+            except Exception as e:
+                # The write is atomic, so on failure the original file is untouched
+                logging.error(f"Error updating {file_path}: {str(e)}. Original content left unchanged.")
+                return False
+            if update_description is None:
+                logging.info(f"Initialized '{file_path}' with value 0.")
             else:
-                logging.info(f"[DRY RUN] Would update '{file_path}': {update_description}")
-            
-            return update_description
+                logging.info(f"Updated '{file_path}': {update_description}")
+            return True
+        
+        with ThreadPoolExecutor(max_workers=min(32, len(writes) or 1)) as executor:
+            written = dict(zip((item[0] for item in writes), executor.map(write, writes)))
+        return [value if written.get(file_path, True) else None for file_path, value in zip(file_paths, new_values)]
 
-        except Exception as e:
-            logging.error(f"Error updating {file_path}: {str(e)}. Restoring from backup.")
-            shutil.copy2(backup_path, file_path)
-            return None
+# Errors GitPython's IndexFile raises when .git/index cannot be parsed; the git CLI
+# reports the same condition as a GitCommandError
+INDEX_PARSE_ERRORS = (AssertionError, struct.error, ValueError)
+
+def reset_corrupt_index(repo):
+    """Rebuild a corrupt index from HEAD. The working tree is left untouched."""
+    logging.warning("Corrupted index file detected. Attempting to fix...")
+    # git reset cannot read a corrupt index either, so remove it first
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(os.path.join(repo.git_dir, "index"))
+    repo.git.reset()
 
 def commit_and_push(repo, file_paths, branch_name, remote_name, commit_message_prefix, new_values, dry_run=False):
     """Commit and push changes to the remote repository."""
     for attempt in range(MAX_RETRIES):
         try:
             if not dry_run:
-                repo.git.add(file_paths)
+                try:
+                    repo.index.add(file_paths)
+                except INDEX_PARSE_ERRORS as e:
+                    logging.warning(f"Could not read the index: {e!r}")
+                    reset_corrupt_index(repo)
+                    if attempt < MAX_RETRIES - 1:
+                        continue
+                    raise
                 commit_message = f"{commit_message_prefix}Updated counters: " + ", ".join(f"{path}: {value}" for path, value in zip(file_paths, new_values))
                 repo.index.commit(commit_message)
                 origin = repo.remote(name=remote_name)
@@ -169,28 +236,70 @@ def commit_and_push(repo, file_paths, branch_name, remote_name, commit_message_p
                 logging.error(f"Git operation failed after {MAX_RETRIES} attempts: {str(e)}")
                 raise
 
-def send_notification(smtp_config, recipient, subject, body):
-    """Send an email notification."""
+class SmtpClient:
+    """SMTP connection that is opened lazily and reused across notifications."""
+
+    def __init__(self):
+        self._conn = None
+        self._conn_config = None
+        # Sends may come from overlapping scheduler ticks on worker threads
+        self._lock = threading.Lock()
+
+    def _connect(self, smtp_config):
+        if smtp_config.get('SMTP_USE_SSL', True):
+            conn = smtplib.SMTP_SSL(smtp_config['SMTP_SERVER'], smtp_config['SMTP_PORT'], context=SSL_CONTEXT)
+        else:
+            conn = smtplib.SMTP(smtp_config['SMTP_SERVER'], smtp_config['SMTP_PORT'])
+            conn.starttls(context=SSL_CONTEXT)
+        conn.login(smtp_config['SMTP_USER'], smtp_config['SMTP_PASSWORD'])
+        self._conn = conn
+        self._conn_config = dict(smtp_config)
+
+    def _is_alive(self):
+        try:
+            return self._conn.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def send_message(self, smtp_config, msg):
+        """Send a message, reconnecting if the connection dropped or the config changed."""
+        with self._lock:
+            if self._conn is None or self._conn_config != smtp_config or not self._is_alive():
+                self._close()
+                self._connect(smtp_config)
+            self._conn.send_message(msg)
+
+    def close(self):
+        """Close the connection, if open."""
+        with self._lock:
+            self._close()
+
+    def _close(self):
+        if self._conn is not None:
+            try:
+                self._conn.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._conn = None
+            self._conn_config = None
+
+def send_notification(smtp_config, recipient, subject, body, smtp_client=None):
+    """Send an email notification, reusing smtp_client's connection if given."""
     msg = MIMEText(body)
     msg['Subject'] = subject
     msg['From'] = smtp_config['SMTP_USER']
     msg['To'] = recipient
 
-    context = ssl.create_default_context()
-
+    client = smtp_client or SmtpClient()
     try:
-        if smtp_config.get('SMTP_USE_SSL', True):
-            with smtplib.SMTP_SSL(smtp_config['SMTP_SERVER'], smtp_config['SMTP_PORT'], context=context) as server:
-                server.login(smtp_config['SMTP_USER'], smtp_config['SMTP_PASSWORD'])
-                server.send_message(msg)
-        else:
-            with smtplib.SMTP(smtp_config['SMTP_SERVER'], smtp_config['SMTP_PORT']) as server:
-                server.starttls(context=context)
-                server.login(smtp_config['SMTP_USER'], smtp_config['SMTP_PASSWORD'])
-                server.send_message(msg)
+        client.send_message(smtp_config, msg)
         logging.info(f"Notification email sent to {recipient}")
     except Exception as e:
         logging.error(f"Failed to send notification email: {str(e)}")
+        client.close()
+    finally:
+        if smtp_client is None:
+            client.close()
 
 def parse_arguments():
     """Parse command-line arguments."""
@@ -199,18 +308,17 @@ def parse_arguments():
     parser.add_argument("--dry-run", action="store_true", help="Perform a dry run without making actual changes")
     return parser.parse_args()
 
-def main(dry_run=False):
+async def main(config, dry_run=False, smtp_client=None):
     """Main function to automate the file update and Git commit."""
-    config = None
     repo = None
     try:
-        config = load_config()
         repo = ensure_repo_path(config["REPO_PATH"])
         with repo:  # Use context manager for the repository
             setup_git_config(repo, config["GIT_USER_NAME"], config["GIT_USER_EMAIL"])
             
-            new_values = [update_file(file_path, dry_run=dry_run) for file_path in config["FILE_PATHS"]]
-            commit_and_push(
+            new_values = await asyncio.to_thread(update_files, config["FILE_PATHS"], dry_run=dry_run)
+            await asyncio.to_thread(
+                commit_and_push,
                 repo,
                 config["FILE_PATHS"],
                 config["BRANCH_NAME"],
@@ -224,11 +332,13 @@ def main(dry_run=False):
                 "Changes were simulated (dry run)." if dry_run else 
                 f"Updated files: {', '.join(config['FILE_PATHS'])}"
             )
-            send_notification(
+            await asyncio.to_thread(
+                send_notification,
                 {k: config[k] for k in ['SMTP_SERVER', 'SMTP_PORT', 'SMTP_USER', 'SMTP_PASSWORD']},
                 config['NOTIFICATION_EMAIL'],
                 "Auto-commit script execution report",
-                notification_body
+                notification_body,
+                smtp_client=smtp_client
             )
             
         logging.info("Script executed successfully.")
@@ -236,34 +346,69 @@ def main(dry_run=False):
         logging.error(f"An error occurred: {str(e)}")
         
         if config and 'NOTIFICATION_EMAIL' in config:
-            send_notification(
+            await asyncio.to_thread(
+                send_notification,
                 {k: config[k] for k in ['SMTP_SERVER', 'SMTP_PORT', 'SMTP_USER', 'SMTP_PASSWORD']},
                 config['NOTIFICATION_EMAIL'],
                 "Auto-commit script execution failed",
-                f"An error occurred: {str(e)}"
+                f"An error occurred: {str(e)}",
+                smtp_client=smtp_client
             )
     finally:
         if repo and not isinstance(repo, git.Repo):
             repo.close()
 
+async def _scheduler_loop(config, dry_run=False, smtp_client=None):
+    """Run scheduled jobs; each run of main is a task, so a tick's network I/O overlaps the next tick."""
+    loop = asyncio.get_running_loop()
+    pending = set()
+
+    def start_run():
+        """Start one run of main, reloading the config first (a cache hit while the file is unchanged)."""
+        nonlocal config
+        try:
+            config = load_config()
+        except Exception as e:
+            logging.error(f"Failed to reload configuration, keeping the previous one: {str(e)}")
+        task = loop.create_task(main(config, dry_run=dry_run, smtp_client=smtp_client))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+
+    start_run()
+    # The interval is read once at startup; later config reloads only affect the runs themselves
+    schedule.every(config["SCHEDULE_INTERVAL_MINUTES"]).minutes.do(start_run)
+    
+    print("Scheduler started. Press Ctrl+C to exit.")
+    try:
+        while True:
+            schedule.run_pending()
+            await asyncio.sleep(1)
+    finally:
+        schedule.clear()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
 def run_scheduled_task():
     """Run the main task with scheduling."""
     args = parse_arguments()
     global CONFIG_FILE
     CONFIG_FILE = args.config
-    main(dry_run=args.dry_run)
-    
-    print("Scheduler started. Press Ctrl+C to exit.")
     try:
-        while True:
-            schedule.run_pending()
-            time.sleep(1)
+        config = load_config()
+    except Exception as e:
+        logging.error(f"Failed to load configuration: {str(e)}")
+        print(f"An error occurred. Check the log file '{LOG_FILE}' for details.")
+        return
+    smtp_client = SmtpClient()
+    try:
+        asyncio.run(_scheduler_loop(config, dry_run=args.dry_run, smtp_client=smtp_client))
     except KeyboardInterrupt:
         print("Scheduler stopped.")
     except Exception as e:
         logging.error(f"An unexpected error occurred in the scheduler: {str(e)}")
         print(f"An error occurred. Check the log file '{LOG_FILE}' for details.")
     finally:
+        smtp_client.close()
         print("Exiting the script.")
 
 if __name__ == "__main__":
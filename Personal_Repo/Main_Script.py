@@ -5,20 +5,32 @@ import logging
 from datetime import datetime
 import configparser
 import argparse
+import contextlib
+import functools
+import pickle
+import random
+import re
+import struct
 import git
-import shutil
+import threading
 import time
 import smtplib
 from email.mime.text import MIMEText
+from concurrent.futures import ThreadPoolExecutor
 from filelock import FileLock
-import unittest
-import tempfile
 
 # Configuration
 CONFIG_FILE = r'C:\Users\USER\GitHub_Automation_Script\config.ini'
 LOG_FILE = "auto_commit.log"
 MAX_RETRIES = 3
 RETRY_DELAY = 5  # seconds
+MAX_RETRY_DELAY = 60  # seconds
+INDEX_ADD_CHUNK_SIZE = 1000  # paths staged per index.add call
+CONFIG_CACHE_VERSION = 1  # bump when the shape of the load_config dict changes
+IN_PLACE_WRITE_MAX = 4096  # characters; larger files are rewritten atomically via a temp file
+
+# Integer or decimal counter content; group 2 is the fractional part
+_NUM_RE = re.compile(r'(-?\d+)(\.\d+)?\Z')
 
 # Setup Logging
 logging.basicConfig(
@@ -32,13 +44,20 @@ class ConfigurationError(Exception):
     """Custom exception for configuration errors."""
     pass
 
-def load_config():
-    """Load and validate configuration from config file."""
-    if not os.path.exists(CONFIG_FILE):
-        raise FileNotFoundError(f"Configuration file '{CONFIG_FILE}' not found.")
-    
-    config = configparser.ConfigParser()
-    config.read(CONFIG_FILE)
+def load_config(path=None):
+    """Load and validate configuration from path (CONFIG_FILE by default)."""
+    path = path or CONFIG_FILE
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Configuration file '{path}' not found.")
+    # Keyed on mtime so edits to the file are still picked up
+    return _parse_config(path, os.stat(path).st_mtime_ns)
+
+@functools.lru_cache(maxsize=4)
+def _parse_config(path, mtime_ns):
+    """Parse and validate a config file; cached per (path, mtime)."""
+    # No value uses %-interpolation, so skip that machinery entirely
+    config = configparser.ConfigParser(interpolation=None)
+    config.read(path)
     
     required_sections = ["General", "Git", "Notification"]
     required_keys = {
@@ -47,28 +66,67 @@ def load_config():
         "Notification": ["SMTP_SERVER", "SMTP_PORT", "SMTP_USER", "SMTP_PASSWORD", "NOTIFICATION_EMAIL"]
     }
 
+    values = {}
     for section in required_sections:
         if not config.has_section(section):
             raise ConfigurationError(f"Missing required section: {section}")
+        section_values = {key.upper(): value for key, value in config.items(section, raw=True)}
         for key in required_keys[section]:
-            if not config.has_option(section, key):
+            if key not in section_values:
                 raise ConfigurationError(f"Missing required configuration: {section}.{key}")
+        values.update(section_values)
 
-    return {
-        "REPO_PATH": config.get("General", "REPO_PATH"),
-        "FILE_PATHS": [path.strip() for path in config.get("General", "FILE_PATHS").split(",")],
-        "BRANCH_NAME": config.get("General", "BRANCH_NAME"),
-        "REMOTE_NAME": config.get("General", "REMOTE_NAME"),
-        "COMMIT_MESSAGE_PREFIX": config.get("General", "COMMIT_MESSAGE_PREFIX"),
-        "GIT_USER_NAME": config.get("Git", "GIT_USER_NAME"),
-        "GIT_USER_EMAIL": config.get("Git", "GIT_USER_EMAIL"),
-        "SMTP_SERVER": config.get("Notification", "SMTP_SERVER"),
-        "SMTP_PORT": config.getint("Notification", "SMTP_PORT"),
-        "SMTP_USER": config.get("Notification", "SMTP_USER"),
-        "SMTP_PASSWORD": config.get("Notification", "SMTP_PASSWORD"),
-        "NOTIFICATION_EMAIL": config.get("Notification", "NOTIFICATION_EMAIL"),
-        "SMTP_USE_SSL": config.getboolean("Notification", "SMTP_USE_SSL", fallback=True) 
-    }
+    values["FILE_PATHS"] = [path.strip() for path in values["FILE_PATHS"].split(",")]
+    values["SMTP_PORT"] = int(values["SMTP_PORT"])
+    values["SMTP_USE_SSL"] = _parse_bool(values.get("SMTP_USE_SSL", "true"))
+    return values
+
+def _parse_bool(value):
+    """Parse a boolean config value the way ConfigParser.getboolean does."""
+    try:
+        return configparser.ConfigParser.BOOLEAN_STATES[value.lower()]
+    except KeyError:
+        raise ValueError(f"Not a boolean: {value}")
+
+def _load_config_cached(path=None):
+    """Load configuration, reusing a pickled copy while the config file's mtime and size are unchanged."""
+    path = path or CONFIG_FILE
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Configuration file '{path}' not found.")
+    
+    stat = os.stat(path)
+    # The format version invalidates caches written by older parsers
+    key = (CONFIG_CACHE_VERSION, stat.st_mtime_ns, stat.st_size)
+    cache_file = path + ".cache.pkl"
+    try:
+        # Only unpickle a cache that nobody else could have written. Windows has no
+        # uids and reports every writable file as 0o666, so both checks are POSIX-only
+        cache_stat = os.stat(cache_file)
+        private = (not hasattr(os, "getuid")
+                   or (cache_stat.st_uid == os.getuid() and cache_stat.st_mode & 0o022 == 0))
+        if private:
+            with open(cache_file, "rb") as file:
+                cached = pickle.load(file)
+            if isinstance(cached, dict) and key in cached:
+                return cached[key]
+    except Exception:
+        pass
+    
+    config = load_config(path)
+    tmp_path = f"{cache_file}.tmp"
+    try:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        # The cache holds SMTP_PASSWORD, so it is readable by the owner only
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0), 0o600)
+        with os.fdopen(fd, "wb") as file:
+            pickle.dump({key: config}, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_file)
+    except OSError as e:
+        logging.warning("Could not write config cache '%s': %s", cache_file, e)
+    return config
 
 def setup_git_config(repo, git_user_name, git_user_email):
     """Setup Git configuration for the repository."""
@@ -82,126 +140,213 @@ def ensure_repo_path(repo_path):
         raise FileNotFoundError(f"Repository path '{repo_path}' does not exist.")
     
     try:
-        repo = git.Repo(repo_path)
-        logging.info(f"Successfully opened Git repository at '{repo_path}'")
+        repo = git.Repo(repo_path, odbt=git.GitCmdObjectDB)
+        logging.info("Successfully opened Git repository at '%s'", repo_path)
         return repo
     except git.InvalidGitRepositoryError:
         raise EnvironmentError(f"'{repo_path}' is not a valid Git repository.")
 
-def create_backup(file_path):
-    """Create a backup of the file."""
-    backup_path = f"{file_path}.bak"
-    shutil.copy2(file_path, backup_path)
-    logging.info(f"Created backup of '{file_path}' at '{backup_path}'")
-    return backup_path
-
-def update_file(file_path, dry_run=False):
+def write_file_atomic(file_path, content):
+    """Write content to a file atomically via a temporary file and os.replace."""
+    tmp_path = f"{file_path}.tmp"
+    with open(tmp_path, "w") as file:
+        file.write(content)
+    os.replace(tmp_path, file_path)
+
+_PATH_LOCKS = {}
+_PATH_LOCKS_GUARD = threading.Lock()
+
+@contextlib.contextmanager
+def path_lock(file_path):
+    """Hold the in-process lock for file_path, then the cross-process FileLock."""
+    with _PATH_LOCKS_GUARD:
+        thread_lock = _PATH_LOCKS.setdefault(os.path.abspath(file_path), threading.Lock())
+    # Threads in this process wait on the cheap in-process lock instead of polling FileLock
+    with thread_lock, FileLock(f"{file_path}.lock"):
+        yield
+
+def is_requirements_file(file_path):
+    """Return whether file_path names a requirements.txt file."""
+    return os.path.basename(file_path).lower() == "requirements.txt"
+
+def update_file(file_path, dry_run=False, timestamp=None, is_requirements=None):
     """Update the file content based on its type and existing content."""
-    lock = FileLock(f"{file_path}.lock")
+    if is_requirements is None:
+        is_requirements = is_requirements_file(file_path)
+    if timestamp is None:
+        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    # A dry run writes nothing, so it need not serialize against real runs
+    lock = contextlib.nullcontext() if dry_run else path_lock(file_path)
     
     with lock:
-        if not os.path.exists(file_path):
+        try:
+            file = open(file_path, "r" if dry_run else "r+")
+        except FileNotFoundError:
             if not dry_run:
                 with open(file_path, "w") as file:
                     file.write("0")
-                logging.info(f"Initialized '{file_path}' with value 0.")
+                logging.info("Initialized '%s' with value 0.", file_path)
             else:
-                logging.info(f"[DRY RUN] Would initialize '{file_path}' with value 0.")
+                logging.info("[DRY RUN] Would initialize '%s' with value 0.", file_path)
             return "0"
 
-        backup_path = create_backup(file_path)
-
+        original = None
+        written_in_place = False
         try:
-            with open(file_path, "r") as file:
-                content = file.read().strip()
-
-            file_name = os.path.basename(file_path).lower()
-            
-            if "requirements.txt" in file_name:
-                # For requirements.txt, add a timestamp
-                new_content = content + f"\n# Updated on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-                update_description = "timestamp added"
-            elif content.isdigit():
-                # If content is a number, increment it
-                new_content = str(int(content) + 1)
-                update_description = f"incremented to {new_content}"
-            elif content.replace('.', '', 1).isdigit():
-                # If content is a float, increment it
-                new_content = str(float(content) + 1)
-                update_description = f"incremented to {new_content}"
-            else:
-                # For other content, append a line
-                new_content = content + f"\n# Updated on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-                update_description = "new line added"
+            with file:
+                original = file.read()
+                new_content, update_description = _compute_update(original.strip(), is_requirements, timestamp)
+                # Small files are rewritten through the handle already open for reading
+                if not dry_run and len(original) <= IN_PLACE_WRITE_MAX:
+                    file.seek(0)
+                    file.truncate()
+                    file.write(new_content)
+                    written_in_place = True
 
             if not dry_run:
-                with open(file_path, "w") as file:
-                    file.write(new_content)
-                logging.info(f"Updated '{file_path}': {update_description}")
+                if not written_in_place:
+                    write_file_atomic(file_path, new_content)
+                logging.info("Updated '%s': %s", file_path, update_description)
             else:
-                logging.info(f"[DRY RUN] Would update '{file_path}': {update_description}")
+                logging.info("[DRY RUN] Would update '%s': %s", file_path, update_description)
             
             return update_description
 
         except Exception as e:
-            logging.error(f"Error updating {file_path}: {str(e)}. Restoring from backup.")
-            shutil.copy2(backup_path, file_path)
+            logging.error("Error updating %s: %s. Restoring original content.", file_path, e)
+            if not dry_run and original is not None:
+                write_file_atomic(file_path, original)
             return None
 
-def create_backup(file_path):
-    """Create a backup of the file."""
-    backup_path = f"{file_path}.bak"
-    shutil.copy2(file_path, backup_path)
-    logging.info(f"Created backup of '{file_path}' at '{backup_path}'")
-    return backup_path
+def _compute_update(content, is_requirements, timestamp):
+    """Return the new content and a description of the update for a file's stripped content."""
+    number = _NUM_RE.match(content)
+    
+    if is_requirements:
+        # For requirements.txt, add a timestamp
+        return content + f"\n# Updated on {timestamp}", "timestamp added"
+    elif number and not number.group(2):
+        # If content is a number, increment it
+        new_content = str(int(content) + 1)
+        return new_content, f"incremented to {new_content}"
+    elif number:
+        # If content is a float, increment it
+        new_content = str(float(content) + 1)
+        return new_content, f"incremented to {new_content}"
+    else:
+        # For other content, append a line
+        return content + f"\n# Updated on {timestamp}", "new line added"
+
+# Errors GitPython's IndexFile raises when .git/index cannot be parsed; the git CLI
+# reports the same condition as a GitCommandError
+INDEX_PARSE_ERRORS = (AssertionError, struct.error, ValueError)
+
+def reset_corrupt_index(repo):
+    """Rebuild a corrupt index from HEAD. The working tree is left untouched."""
+    logging.warning("Corrupted index file detected. Attempting to fix...")
+    # git reset cannot read a corrupt index either, so remove it first
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(os.path.join(repo.git_dir, "index"))
+    repo.git.reset()
+    # Drop the persistent cat-file processes, which may hold the old index state
+    repo.git.clear_cache()
 
 def commit_and_push(repo, file_paths, branch_name, remote_name, commit_message_prefix, new_values, dry_run=False):
+    commit_message = f"{commit_message_prefix}Updated counters: " + ", ".join(f"{path}: {value}" for path, value in zip(file_paths, new_values))
     for attempt in range(MAX_RETRIES):
         try:
             if not dry_run:
-                repo.git.add(file_paths)
-                commit_message = f"{commit_message_prefix}Updated counters: " + ", ".join(f"{path}: {value}" for path, value in zip(file_paths, new_values))
-                repo.index.commit(commit_message)
+                # repo.index re-reads the index from disk on every access, so keep one
+                # IndexFile for all chunks, the write and the commit. IndexFile.add hashes
+                # the worktree bytes as-is: core.autocrlf and clean filters are not applied.
+                try:
+                    index = repo.index
+                    for start in range(0, len(file_paths), INDEX_ADD_CHUNK_SIZE):
+                        index.add(file_paths[start:start + INDEX_ADD_CHUNK_SIZE], write=False)
+                except INDEX_PARSE_ERRORS as e:
+                    logging.warning("Could not read the index: %r", e)
+                    reset_corrupt_index(repo)
+                    if attempt < MAX_RETRIES - 1:
+                        continue
+                    raise
+                index.write()
+                index.commit(commit_message)
                 origin = repo.remote(name=remote_name)
                 origin.push(refspec=f"{branch_name}:{branch_name}")
                 logging.info("Successfully committed and pushed changes to remote repository.")
             else:
-                logging.info(f"[DRY RUN] Would commit and push changes: {commit_message_prefix}Updated counters: " + ", ".join(f"{path}: {value}" for path, value in zip(file_paths, new_values)))
+                logging.info("[DRY RUN] Would commit and push changes: %s", commit_message)
             return
         except git.GitCommandError as e:
             if "fatal: index file corrupt" in str(e):
-                logging.warning("Corrupted index file detected. Attempting to fix...")
-                repo.git.reset()
+                reset_corrupt_index(repo)
                 continue
             if attempt < MAX_RETRIES - 1:
-                logging.warning(f"Git operation failed (attempt {attempt + 1}/{MAX_RETRIES}): {str(e)}. Retrying in {RETRY_DELAY} seconds...")
-                time.sleep(RETRY_DELAY)
+                # Exponential backoff with full jitter, so concurrent runs do not retry in lockstep
+                delay = random.uniform(0, min(MAX_RETRY_DELAY, RETRY_DELAY * 2 ** attempt))
+                logging.warning("Git operation failed (attempt %d/%d): %s. Retrying in %.1f seconds...", attempt + 1, MAX_RETRIES, e, delay)
+                time.sleep(delay)
             else:
-                logging.error(f"Git operation failed after {MAX_RETRIES} attempts: {str(e)}")
+                logging.error("Git operation failed after %d attempts: %s", MAX_RETRIES, e)
                 raise
 
-def send_notification(smtp_config, recipient, subject, body):
-    """Send an email notification."""
+@functools.lru_cache(maxsize=None)
+def _ssl_ctx():
+    """Return the shared SSL context, created on first use; loading the CA bundle is expensive."""
+    return ssl.create_default_context()
+
+class SMTPSession:
+    """SMTP connection opened on the first send and reused until the session is closed."""
+
+    def __init__(self, smtp_config):
+        self.smtp_config = smtp_config
+        self._server = None
+
+    def _connect(self):
+        context = _ssl_ctx()
+        if self.smtp_config.get('SMTP_USE_SSL', True):
+            server = smtplib.SMTP_SSL(self.smtp_config['SMTP_SERVER'], self.smtp_config['SMTP_PORT'], context=context)
+        else:
+            server = smtplib.SMTP(self.smtp_config['SMTP_SERVER'], self.smtp_config['SMTP_PORT'])
+            server.starttls(context=context)
+        server.login(self.smtp_config['SMTP_USER'], self.smtp_config['SMTP_PASSWORD'])
+        return server
+
+    def send(self, msg):
+        """Send a message, connecting first if needed."""
+        if self._server is None:
+            self._server = self._connect()
+        self._server.send_message(msg)
+
+    def close(self):
+        """Quit the connection, if open."""
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._server = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+def send_notification(session, recipient, subject, body):
+    """Send an email notification over an SMTPSession."""
     msg = MIMEText(body)
     msg['Subject'] = subject
-    msg['From'] = smtp_config['SMTP_USER']
+    msg['From'] = session.smtp_config['SMTP_USER']
     msg['To'] = recipient
 
-    context = ssl.create_default_context()
-
     try:
-        if smtp_config.get('SMTP_USE_SSL', True):
-            with smtplib.SMTP_SSL(smtp_config['SMTP_SERVER'], smtp_config['SMTP_PORT'], context=context) as server:
-                server.login(smtp_config['SMTP_USER'], smtp_config['SMTP_PASSWORD'])
-                server.send_message(msg)
-        else:
-            with smtplib.SMTP(smtp_config['SMTP_SERVER'], smtp_config['SMTP_PORT']) as server:
-                server.starttls(context=context)
-                server.login(smtp_config['SMTP_USER'], smtp_config['SMTP_PASSWORD'])
-                server.send_message(msg)
-        logging.info(f"Notification email sent to {recipient}")
+        session.send(msg)
+        logging.info("Notification email sent to %s", recipient)
     except Exception as e:
-        logging.error(f"Failed to send notification email: {str(e)}")
+        logging.error("Failed to send notification email: %s", e)
+        # Drop a possibly broken connection so the next send reconnects
+        session.close()
 
 
 def parse_arguments():
@@ -209,66 +354,25 @@ def parse_arguments():
     parser = argparse.ArgumentParser(description="Automated Git commit script")
     parser.add_argument("--config", help="Path to custom config file", default=CONFIG_FILE)
     parser.add_argument("--dry-run", action="store_true", help="Perform a dry run without making actual changes")
+    parser.add_argument("--test", action="store_true", help="Run the script's self-tests and exit")
     return parser.parse_args()
 
-def main():
-    """Main function to automate the file update and Git commit."""
-    args = parse_arguments()
-    global CONFIG_FILE
-    CONFIG_FILE = args.config
-
-    try:
-        config = load_config()
-        repo = ensure_repo_path(config["REPO_PATH"])
-        setup_git_config(repo, config["GIT_USER_NAME"], config["GIT_USER_EMAIL"])
-        
-        new_values = [update_file(file_path, dry_run=args.dry_run) for file_path in config["FILE_PATHS"]]
-        commit_and_push(
-            repo,
-            config["FILE_PATHS"],
-            config["BRANCH_NAME"],
-            config["REMOTE_NAME"],
-            config["COMMIT_MESSAGE_PREFIX"],
-            new_values,
-            dry_run=args.dry_run
-        )
+def _run_tests():
+    """Run the self-tests; unittest and tempfile are only imported in this mode."""
+    import shutil
+    import tempfile
+    import unittest
+
+    class TestAutoCommitScript(unittest.TestCase):
+        def setUp(self):
+            self.temp_dir = tempfile.mkdtemp()
+            self.config_path = os.path.join(self.temp_dir, "test_config.ini")
+            self.repo_path = os.path.join(self.temp_dir, "test_repo")
+            self.file_path = os.path.join(self.repo_path, "counter.txt")
         
-        notification_body = "Script executed successfully. " + (
-            "Changes were simulated (dry run)." if args.dry_run else 
-            f"Updated files: {', '.join(config['FILE_PATHS'])}"
-        )
-        send_notification(
-            {k: config[k] for k in ['SMTP_SERVER', 'SMTP_PORT', 'SMTP_USER', 'SMTP_PASSWORD']},
-            config['NOTIFICATION_EMAIL'],
-            "Auto-commit script execution report",
-            notification_body
-        )
-        
-        print("Script executed successfully.")
-    except Exception as e:
-        logging.error(f"An error occurred: {str(e)}")
-        print(f"An error occurred. Check the log file '{LOG_FILE}' for details.")
-        
-        if 'NOTIFICATION_EMAIL' in config:
-            send_notification(
-                {k: config[k] for k in ['SMTP_SERVER', 'SMTP_PORT', 'SMTP_USER', 'SMTP_PASSWORD']},
-                config['NOTIFICATION_EMAIL'],
-                "Auto-commit script execution failed",
-                f"An error occurred: {str(e)}"
-            )
-        
-        sys.exit(1)
-
-class TestAutoCommitScript(unittest.TestCase):
-    def setUp(self):
-        self.temp_dir = tempfile.mkdtemp()
-        self.config_path = os.path.join(self.temp_dir, "test_config.ini")
-        self.repo_path = os.path.join(self.temp_dir, "test_repo")
-        self.file_path = os.path.join(self.repo_path, "counter.txt")
-        
-        # Create a test config file
-        with open(self.config_path, "w") as f:
-            f.write(f"""
+            # Create a test config file
+            with open(self.config_path, "w") as f:
+                f.write(f"""
 [General]
 REPO_PATH = {self.repo_path}
 FILE_PATHS = {self.file_path}
@@ -288,50 +392,62 @@ SMTP_PASSWORD = password
 NOTIFICATION_EMAIL = notify@example.com
 """)
         
-        # Initialize test repository
-        os.mkdir(self.repo_path)
-        self.repo = git.Repo.init(self.repo_path)
-        self.repo.create_remote("origin", url="https://github.com/test/test.git")
+            # Initialize test repository
+            os.mkdir(self.repo_path)
+            self.repo = git.Repo.init(self.repo_path)
+            self.repo.create_remote("origin", url="https://github.com/test/test.git")
         
-        # Create initial commit
-        open(self.file_path, "w").close()
-        self.repo.index.add([self.file_path])
-        self.repo.index.commit("Initial commit")
-
-    def tearDown(self):
-        shutil.rmtree(self.temp_dir)
-
-    def test_load_config(self):
-        global CONFIG_FILE
-        CONFIG_FILE = self.config_path
-        config = load_config()
-        self.assertEqual(config["REPO_PATH"], self.repo_path)
-        self.assertEqual(config["FILE_PATHS"], [self.file_path])
-
-    def test_update_file(self):
-        new_value = update_file(self.file_path)
-        self.assertEqual(new_value, 1)
-        with open(self.file_path, "r") as f:
-            self.assertEqual(f.read().strip(), "1")
-
-    def test_commit_and_push(self):
-        update_file(self.file_path)
-        commit_and_push(self.repo, [self.file_path], "main", "origin", "Test: ", [1])
-        self.assertEqual(self.repo.head.commit.message, "Test: Updated counters: counter.txt: 1")
+            # Create initial commit
+            open(self.file_path, "w").close()
+            self.repo.index.add([self.file_path])
+            self.repo.index.commit("Initial commit")
+
+        def tearDown(self):
+            shutil.rmtree(self.temp_dir)
+
+        def test_load_config(self):
+            config = load_config(self.config_path)
+            self.assertEqual(config["REPO_PATH"], self.repo_path)
+            self.assertEqual(config["FILE_PATHS"], [self.file_path])
+
+        def test_update_file(self):
+            new_value = update_file(self.file_path)
+            self.assertEqual(new_value, 1)
+            with open(self.file_path, "r") as f:
+                self.assertEqual(f.read().strip(), "1")
+
+        def test_commit_and_push(self):
+            update_file(self.file_path)
+            commit_and_push(self.repo, [self.file_path], "main", "origin", "Test: ", [1])
+            self.assertEqual(self.repo.head.commit.message, "Test: Updated counters: counter.txt: 1")
+
+    suite = unittest.defaultTestLoader.loadTestsFromTestCase(TestAutoCommitScript)
+    return unittest.TextTestRunner().run(suite).wasSuccessful()
 
 def main():
     args = parse_arguments()
-    global CONFIG_FILE
-    CONFIG_FILE = args.config
+    if args.test:
+        sys.exit(0 if _run_tests() else 1)
     repo = None
+    smtp_session = None
 
     try:
-        config = load_config()
+        config = _load_config_cached(args.config)
+        # One session serves both the success and the failure notification
+        smtp_session = SMTPSession({k: config[k] for k in ['SMTP_SERVER', 'SMTP_PORT', 'SMTP_USER', 'SMTP_PASSWORD']})
         repo = ensure_repo_path(config["REPO_PATH"])
         with repo:  
             setup_git_config(repo, config["GIT_USER_NAME"], config["GIT_USER_EMAIL"])
             
-            new_values = [update_file(file_path, dry_run=args.dry_run) for file_path in config["FILE_PATHS"]]
+            # One timestamp for every file updated in this run
+            timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            file_meta = [(file_path, is_requirements_file(file_path)) for file_path in config["FILE_PATHS"]]
+            # Each update holds its own per-path lock, so files can be updated concurrently
+            with ThreadPoolExecutor(max_workers=min(8, len(file_meta)) or 1) as executor:
+                new_values = list(executor.map(
+                    lambda meta: update_file(meta[0], dry_run=args.dry_run, timestamp=timestamp, is_requirements=meta[1]),
+                    file_meta
+                ))
             commit_and_push(
                 repo,
                 config["FILE_PATHS"],
@@ -347,7 +463,7 @@ def main():
                 f"Updated files: {', '.join(config['FILE_PATHS'])}"
             )
             send_notification(
-                {k: config[k] for k in ['SMTP_SERVER', 'SMTP_PORT', 'SMTP_USER', 'SMTP_PASSWORD']},
+                smtp_session,
                 config['NOTIFICATION_EMAIL'],
                 "Auto-commit script execution report",
                 notification_body
@@ -355,12 +471,12 @@ def main():
             
             print("Script executed successfully.")
     except Exception as e:
-        logging.error(f"An error occurred: {str(e)}")
+        logging.error("An error occurred: %s", e)
         print(f"An error occurred. Check the log file '{LOG_FILE}' for details.")
         
-        if 'NOTIFICATION_EMAIL' in config:
+        if smtp_session is not None:
             send_notification(
-                {k: config[k] for k in ['SMTP_SERVER', 'SMTP_PORT', 'SMTP_USER', 'SMTP_PASSWORD']},
+                smtp_session,
                 config['NOTIFICATION_EMAIL'],
                 "Auto-commit script execution failed",
                 f"An error occurred: {str(e)}"
@@ -368,6 +484,8 @@ def main():
         
         sys.exit(1)
     finally:
+        if smtp_session is not None:
+            smtp_session.close()
         if repo and not isinstance(repo, git.Repo):
             repo.close()
 